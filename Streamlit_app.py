@@ -1,13 +1,8 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler
 import plotly.express as px
-import plotly.graph_objects as go
-from io import StringIO
-import base64
+
+from ambrix import ContentRecommendationSystem, ModelRegistry, content_key
 
 # Configure Streamlit page
 st.set_page_config(
@@ -17,6 +12,17 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+@st.cache_resource
+def get_model_registry():
+    """One engine registry per server process, shared by every session"""
+    return ModelRegistry()
+
+def build_recommender(users_file, posts_file, engagements_file):
+    recommender = ContentRecommendationSystem()
+    if not recommender.load_data(users_file, posts_file, engagements_file):
+        raise ValueError(recommender.load_error)
+    return recommender
+
 # Professional Dark Theme with Glassmorphism
 def load_css():
     st.markdown("""
@@ -472,192 +478,6 @@ def load_css():
     </style>
     """, unsafe_allow_html=True)
 
-class ContentRecommendationSystem:
-    def __init__(self):
-        self.users_df = None
-        self.posts_df = None
-        self.engagements_df = None
-        self.user_item_matrix = None
-        self.content_features = None
-        self.scaler = StandardScaler()
-        
-    def load_data(self, users_file, posts_file, engagements_file):
-        """Load and process the uploaded data files"""
-        try:
-            self.users_df = pd.read_csv(users_file)
-            self.posts_df = pd.read_csv(posts_file)
-            self.engagements_df = pd.read_csv(engagements_file)
-            
-            # Clean and preprocess data
-            self._preprocess_data()
-            return True
-        except Exception as e:
-            st.error(f"Error loading data: {str(e)}")
-            return False
-    
-    def _preprocess_data(self):
-        """Preprocess the loaded data"""
-        # Create user-item interaction matrix
-        self.user_item_matrix = self.engagements_df.pivot_table(
-            index='user_id', 
-            columns='post_id', 
-            values='engagement', 
-            fill_value=0
-        )
-        
-        # Process user interests
-        if 'top_3_interests' in self.users_df.columns:
-            self.users_df['interests_list'] = self.users_df['top_3_interests'].str.split(', ')
-        
-        # Process post tags
-        if 'tags' in self.posts_df.columns:
-            self.posts_df['tags_list'] = self.posts_df['tags'].str.split(', ')
-            
-            # Create TF-IDF features for content
-            tfidf = TfidfVectorizer(stop_words='english', max_features=100)
-            tags_text = self.posts_df['tags'].fillna('')
-            self.content_features = tfidf.fit_transform(tags_text)
-    
-    def calculate_user_similarity(self):
-        """Calculate user-user similarity based on engagement patterns"""
-        user_similarity = cosine_similarity(self.user_item_matrix)
-        return pd.DataFrame(
-            user_similarity, 
-            index=self.user_item_matrix.index, 
-            columns=self.user_item_matrix.index
-        )
-    
-    def content_based_recommendations(self, user_id, n_recommendations=3):
-        """Generate content-based recommendations"""
-        if user_id not in self.users_df['user_id'].values:
-            return []
-        
-        user_data = self.users_df[self.users_df['user_id'] == user_id].iloc[0]
-        user_interests = user_data.get('interests_list', [])
-        
-        # Calculate content scores
-        post_scores = []
-        for idx, post in self.posts_df.iterrows():
-            score = 0
-            post_tags = post.get('tags_list', [])
-            
-            # Interest matching score
-            if user_interests and post_tags:
-                common_interests = set(user_interests) & set(post_tags)
-                score += len(common_interests) * 2
-            
-            # Engagement history bias
-            past_engagement = self.engagements_df[
-                (self.engagements_df['user_id'] == user_id) & 
-                (self.engagements_df['post_id'] == post['post_id'])
-            ]
-            
-            if len(past_engagement) == 0:  # New content
-                score += 1
-            elif past_engagement.iloc[0]['engagement'] == 0:
-                score -= 1  # Previously disliked
-            
-            post_scores.append({
-                'post_id': post['post_id'],
-                'score': score,
-                'content_type': post.get('content_type', 'unknown'),
-                'tags': post.get('tags', ''),
-                'creator_id': post.get('creator_id', '')
-            })
-        
-        # Sort and return top recommendations
-        post_scores.sort(key=lambda x: x['score'], reverse=True)
-        return post_scores[:n_recommendations]
-    
-    def collaborative_filtering_recommendations(self, user_id, n_recommendations=3):
-        """Generate collaborative filtering recommendations"""
-        if user_id not in self.user_item_matrix.index:
-            return []
-        
-        user_similarity = self.calculate_user_similarity()
-        similar_users = user_similarity[user_id].sort_values(ascending=False)[1:6]  # Top 5 similar users
-        
-        # Get posts liked by similar users but not seen by target user
-        user_posts = set(self.engagements_df[self.engagements_df['user_id'] == user_id]['post_id'])
-        recommendations = []
-        
-        for similar_user, similarity_score in similar_users.items():
-            similar_user_posts = self.engagements_df[
-                (self.engagements_df['user_id'] == similar_user) & 
-                (self.engagements_df['engagement'] == 1)
-            ]['post_id'].tolist()
-            
-            for post_id in similar_user_posts:
-                if post_id not in user_posts:
-                    post_info = self.posts_df[self.posts_df['post_id'] == post_id]
-                    if not post_info.empty:
-                        recommendations.append({
-                            'post_id': post_id,
-                            'score': similarity_score,
-                            'content_type': post_info.iloc[0].get('content_type', 'unknown'),
-                            'tags': post_info.iloc[0].get('tags', ''),
-                            'creator_id': post_info.iloc[0].get('creator_id', '')
-                        })
-        
-        # Remove duplicates and sort
-        seen_posts = set()
-        unique_recommendations = []
-        for rec in recommendations:
-            if rec['post_id'] not in seen_posts:
-                unique_recommendations.append(rec)
-                seen_posts.add(rec['post_id'])
-        
-        unique_recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return unique_recommendations[:n_recommendations]
-    
-    def hybrid_recommendations(self, user_id, n_recommendations=3):
-        """Generate hybrid recommendations combining content-based and collaborative filtering"""
-        content_recs = self.content_based_recommendations(user_id, n_recommendations * 2)
-        collab_recs = self.collaborative_filtering_recommendations(user_id, n_recommendations * 2)
-        
-        # Combine and weight recommendations
-        all_recs = {}
-        
-        # Add content-based recommendations with weight 0.6
-        for rec in content_recs:
-            post_id = rec['post_id']
-            all_recs[post_id] = all_recs.get(post_id, {
-                'content_score': 0, 
-                'collab_score': 0,
-                'content_type': rec['content_type'],
-                'tags': rec['tags'],
-                'creator_id': rec['creator_id']
-            })
-            all_recs[post_id]['content_score'] = rec['score']
-        
-        # Add collaborative recommendations with weight 0.4
-        for rec in collab_recs:
-            post_id = rec['post_id']
-            if post_id not in all_recs:
-                all_recs[post_id] = {
-                    'content_score': 0, 
-                    'collab_score': 0,
-                    'content_type': rec['content_type'],
-                    'tags': rec['tags'],
-                    'creator_id': rec['creator_id']
-                }
-            all_recs[post_id]['collab_score'] = rec['score']
-        
-        # Calculate hybrid scores
-        final_recs = []
-        for post_id, scores in all_recs.items():
-            hybrid_score = 0.6 * scores['content_score'] + 0.4 * scores['collab_score']
-            final_recs.append({
-                'post_id': post_id,
-                'score': hybrid_score,
-                'content_type': scores['content_type'],
-                'tags': scores['tags'],
-                'creator_id': scores['creator_id']
-            })
-        
-        final_recs.sort(key=lambda x: x['score'], reverse=True)
-        return final_recs[:n_recommendations]
-
 def main():
     load_css()
     
@@ -744,7 +564,7 @@ user_id,post_id,engagement
     with col1:
         st.markdown('<div class="zone">', unsafe_allow_html=True)
         st.markdown("#### Users Dataset")
-        users_file = st.file_uploader("Select Users.csv", type=['csv'], key="users", help="User profiles and preferences data")
+        users_file = st.file_uploader("Select Users.csv", type=['csv', 'parquet', 'arrow', 'feather'], key="users", help="User profiles and preferences data")
         if users_file:
             st.markdown('<div class="success-alert">Users dataset uploaded successfully</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
@@ -752,7 +572,7 @@ user_id,post_id,engagement
     with col2:
         st.markdown('<div class="zone">', unsafe_allow_html=True)
         st.markdown("#### Posts Dataset")
-        posts_file = st.file_uploader("Select Posts.csv", type=['csv'], key="posts", help="Content metadata and categorization data")
+        posts_file = st.file_uploader("Select Posts.csv", type=['csv', 'parquet', 'arrow', 'feather'], key="posts", help="Content metadata and categorization data")
         if posts_file:
             st.markdown('<div class="success-alert">Posts dataset uploaded successfully</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
@@ -760,7 +580,7 @@ user_id,post_id,engagement
     with col3:
         st.markdown('<div class="zone">', unsafe_allow_html=True)
         st.markdown("#### Engagements Dataset")
-        engagements_file = st.file_uploader("Select Engagements.csv", type=['csv'], key="engagements", help="User interaction and engagement data")
+        engagements_file = st.file_uploader("Select Engagements.csv", type=['csv', 'parquet', 'arrow', 'feather'], key="engagements", help="User interaction and engagement data")
         if engagements_file:
             st.markdown('<div class="success-alert">Engagements dataset uploaded successfully</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
@@ -778,12 +598,26 @@ user_id,post_id,engagement
         with col2:
             if st.button("Initialize Recommendation Engine", use_container_width=True):
                 with st.spinner("Processing datasets and initializing ML models..."):
-                    success = st.session_state.recommender.load_data(users_file, posts_file, engagements_file)
-                    if success:
+                    registry = get_model_registry()
+                    dataset_key = content_key(users_file, posts_file, engagements_file)
+                    try:
+                        lease = registry.acquire(
+                            dataset_key,
+                            lambda: build_recommender(users_file, posts_file, engagements_file)
+                        )
+                    except ValueError as e:
+                        lease, load_error = None, str(e)
+                    if lease is not None:
+                        # Release the previously shared engine before switching datasets
+                        if 'model_lease' in st.session_state:
+                            st.session_state.model_lease.release()
+                        st.session_state.model_lease = lease
+                        st.session_state.recommender = lease.engine
                         st.balloons()
                         st.markdown('<div class="success-alert">System initialization completed successfully. Ready for recommendation generation.</div>', unsafe_allow_html=True)
                         st.session_state.data_loaded = True
                     else:
+                        st.error(f"Error loading data: {load_error}")
                         st.markdown('<div class="warning-alert">Initialization failed. Please verify your CSV file formats and schema compliance.</div>', unsafe_allow_html=True)
     
     # Step 5: Algorithm Framework Overview
@@ -835,7 +669,7 @@ user_id,post_id,engagement
             <p><strong>Methodology:</strong></p>
             <ul class="feature-list">
                 <li>Weighted ensemble approach (60/40 ratio)</li>
-                <li>Content-collaborative score fusion</li>
+                <li>Content-collaborative score fusion over min-max normalized score vectors</li>
                 <li>Multi-objective optimization</li>
                 <li>Diversity-accuracy balancing</li>
                 <li>Cross-validation performance tuning</li>
@@ -879,6 +713,38 @@ user_id,post_id,engagement
             st.metric("Engagement Rate", f"{engagement_rate:.1f}%", help="Percentage of positive user interactions")
             st.markdown('</div>', unsafe_allow_html=True)
         
+        matrix_report = st.session_state.recommender.user_item_matrix.memory_report()
+        registry_stats = get_model_registry().stats()
+        load_report = st.session_state.recommender.load_report
+        ingestion_line = ""
+        result_cache_line = ""
+        if st.session_state.recommender.result_cache is not None:
+            cache_stats = st.session_state.recommender.result_cache.stats()
+            result_cache_line = (
+                f"<p><strong>Result Cache:</strong> {cache_stats['entries']:,} cached result(s) for "
+                f"{cache_stats['users']:,} user(s), {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses "
+                f"({cache_stats['hit_rate']:.0%} hit rate)</p>"
+            )
+        if 'engagements' in load_report:
+            ingestion_line = (
+                f"<p><strong>Ingestion:</strong> {load_report['engagements']['rows']:,} engagements at "
+                f"{load_report['engagements']['rows_per_sec']:,.0f} rows/sec, "
+                f"{load_report['engagements']['frame_bytes'] / 1024 ** 2:.2f} MB in memory</p>"
+            )
+        st.markdown(f"""
+        <div class="info-box">
+            <p><strong>Interaction Matrix:</strong> {matrix_report['n_users']:,} users × {matrix_report['n_posts']:,} posts,
+            {matrix_report['nnz']:,} stored interactions ({matrix_report['density']:.2%} density)</p>
+            <p><strong>Memory:</strong> {matrix_report['sparse_bytes'] / 1024 ** 2:.2f} MB sparse vs
+            {matrix_report['dense_bytes'] / 1024 ** 2:.2f} MB dense pivot ({matrix_report['compression_ratio']:.1f}× smaller)</p>
+            <p><strong>Shared Engine Cache:</strong> {registry_stats['models']} dataset(s),
+            {registry_stats['bytes'] / 1024 ** 2:.1f} MB of {registry_stats['memory_budget_bytes'] / 1024 ** 2:.0f} MB budget,
+            {registry_stats['active_leases']} active session(s)</p>
+            {result_cache_line}
+            {ingestion_line}
+        </div>
+        """, unsafe_allow_html=True)
+        
         # Step 7: Recommendation Generation Interface
         st.markdown("""
         <div class="glass-container">
@@ -895,7 +761,7 @@ user_id,post_id,engagement
         
         with col2:
             algorithm = st.selectbox("Algorithm Selection:", 
-                                   ["Hybrid Implementation", "Content-Based Filtering", "Collaborative Filtering"],
+                                   ["Hybrid Implementation", "Content-Based Filtering", "TF-IDF Content Matching", "Collaborative Filtering", "Item-Based Filtering", "Matrix Factorization (ALS)"],
                                    help="Choose the machine learning algorithm for recommendation generation")
         
         with col3:
@@ -903,13 +769,24 @@ user_id,post_id,engagement
             generate_btn = st.button("Generate Recommendations", use_container_width=True)
         
         if generate_btn:
-            with st.spinner("Processing user data and generating personalized recommendations..."):
+            # Stage timings of this request, shown under the results
+            with st.spinner("Processing user data and generating personalized recommendations..."), \
+                    st.session_state.recommender.metrics.trace() as timings:
                 if algorithm == "Content-Based Filtering":
                     recommendations = st.session_state.recommender.content_based_recommendations(selected_user)
                     algorithm_used = "Content-Based Filtering"
+                elif algorithm == "TF-IDF Content Matching":
+                    recommendations = st.session_state.recommender.tfidf_recommendations(selected_user)
+                    algorithm_used = "TF-IDF Content Matching"
                 elif algorithm == "Collaborative Filtering":
                     recommendations = st.session_state.recommender.collaborative_filtering_recommendations(selected_user)
                     algorithm_used = "Collaborative Filtering"
+                elif algorithm == "Item-Based Filtering":
+                    recommendations = st.session_state.recommender.item_based_recommendations(selected_user)
+                    algorithm_used = "Item-Based Filtering"
+                elif algorithm == "Matrix Factorization (ALS)":
+                    recommendations = st.session_state.recommender.als_recommendations(selected_user)
+                    algorithm_used = "Matrix Factorization (ALS)"
                 else:
                     recommendations = st.session_state.recommender.hybrid_recommendations(selected_user)
                     algorithm_used = "Hybrid Implementation"
@@ -917,6 +794,7 @@ user_id,post_id,engagement
                 st.session_state.current_recommendations = recommendations
                 st.session_state.current_user = selected_user
                 st.session_state.algorithm_used = algorithm_used
+            st.session_state.request_timings = timings
         
         # Step 8: Recommendation Results Display
         if hasattr(st.session_state, 'current_recommendations'):
@@ -947,6 +825,18 @@ user_id,post_id,engagement
                     """, unsafe_allow_html=True)
             else:
                 st.markdown('<div class="warning-alert">No recommendations available for the selected user and algorithm combination. Consider trying an alternative algorithm or different user profile.</div>', unsafe_allow_html=True)
+            
+            timings = dict(st.session_state.get('request_timings', {}))
+            if timings:
+                total = timings.pop('total')
+                other = max(total - sum(timings.values()), 0.0)
+                stages = " · ".join(f"{stage} {seconds * 1000:.2f} ms" for stage, seconds in timings.items())
+                st.markdown(f"""
+                <div class="info-box">
+                    <p><strong>Timing Breakdown:</strong> {total * 1000:.2f} ms total — {stages or 'no instrumented stages'}
+                    · other {other * 1000:.2f} ms</p>
+                </div>
+                """, unsafe_allow_html=True)
         
         # Step 9: Analytics and Insights Dashboard
         st.markdown("""
@@ -0,0 +1,57 @@
+"""AMBRIX recommendation engine
+
+The engine is importable without the Streamlit UI. Heavy modules are only
+imported when one of the names below is first accessed, so ``import ambrix``
+and the CLI start quickly.
+"""
+
+__all__ = [
+    'ContentRecommendationSystem',
+    'InteractionMatrix',
+    'EngagementIndex',
+    'UserSimilarityIndex',
+    'ItemSimilarityIndex',
+    'ALSModel',
+    'IdVocabulary',
+    'ExactNeighborIndex',
+    'IVFNeighborIndex',
+    'NEIGHBOR_INDEXES',
+    'neighbor_recall_report',
+    'PopularityIndex',
+    'read_table',
+    'SchemaError',
+    'ModelRegistry',
+    'content_key',
+    'Metrics',
+]
+
+_EXPORTS = {
+    'ContentRecommendationSystem': 'engine',
+    'InteractionMatrix': 'interactions',
+    'EngagementIndex': 'interactions',
+    'UserSimilarityIndex': 'similarity',
+    'ItemSimilarityIndex': 'similarity',
+    'ALSModel': 'factorization',
+    'IdVocabulary': 'ids',
+    'ExactNeighborIndex': 'neighbors',
+    'IVFNeighborIndex': 'neighbors',
+    'NEIGHBOR_INDEXES': 'neighbors',
+    'neighbor_recall_report': 'neighbors',
+    'PopularityIndex': 'popularity',
+    'read_table': 'loaders',
+    'SchemaError': 'loaders',
+    'ModelRegistry': 'registry',
+    'content_key': 'registry',
+    'Metrics': 'metrics',
+}
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'ambrix' has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
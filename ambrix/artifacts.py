@@ -0,0 +1,180 @@
+"""Versioned on-disk model artifacts with memory-mapped loading
+
+An artifact root holds one directory per fit plus a ``LATEST`` pointer::
+
+    artifacts/
+        LATEST                  -> "20261018T120000-3f2a"
+        20261018T120000-3f2a/
+            manifest.json       # format version, engine config, object layout
+            user_tag_matrix.data.npy
+            user_tag_matrix.indices.npy
+            ...
+
+Every array is a plain ``.npy`` file, and sparse matrices are stored as their
+``data``/``indices``/``indptr`` arrays, so ``load_state(..., mmap_mode='r')``
+maps them without reading them into memory. Worker processes that load the
+same version share the page cache instead of holding private copies.
+"""
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+LATEST = 'LATEST'
+
+def _save_array(directory, name, array):
+    array = np.asarray(array)
+    if array.dtype == object:
+        array = array.astype(str)
+    np.save(os.path.join(directory, f'{name}.npy'), array, allow_pickle=False)
+    return f'{name}.npy'
+
+def _load_array(directory, filename, mmap_mode):
+    path = os.path.join(directory, filename)
+    # Empty arrays cannot be memory-mapped
+    if mmap_mode and os.path.getsize(path) > 128:
+        return np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+    return np.load(path, allow_pickle=False)
+
+def _save_column(directory, name, values):
+    """Numeric columns are stored as-is, everything else as category codes"""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+        return {'type': 'array', 'file': _save_array(directory, name, values.to_numpy())}
+    codes, categories = pd.factorize(values)
+    return {
+        'type': 'categorical',
+        'codes': _save_array(directory, f'{name}.codes', codes.astype(np.int32)),
+        'categories': _save_array(directory, f'{name}.categories', np.asarray(categories, dtype=object))
+    }
+
+def _load_column(directory, entry, mmap_mode):
+    if entry['type'] == 'array':
+        return _load_array(directory, entry['file'], mmap_mode)
+    codes = _load_array(directory, entry['codes'], mmap_mode)
+    categories = _load_array(directory, entry['categories'], None)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+def _write(directory, name, value):
+    """Write one state value and return its manifest entry"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return {'type': 'value', 'value': value}
+    if isinstance(value, (np.integer, np.floating)):
+        return {'type': 'value', 'value': value.item()}
+    if isinstance(value, dict):
+        return {'type': 'dict', 'items': {
+            key: _write(directory, f'{name}.{key}', item) for key, item in value.items()
+        }}
+    if sp.issparse(value):
+        value = value.tocsr()
+        return {
+            'type': 'csr',
+            'shape': list(value.shape),
+            'data': _save_array(directory, f'{name}.data', value.data),
+            'indices': _save_array(directory, f'{name}.indices', value.indices),
+            'indptr': _save_array(directory, f'{name}.indptr', value.indptr)
+        }
+    if isinstance(value, pd.DataFrame):
+        # List-valued columns have no array representation and are not persisted
+        columns = [column for column in value.columns
+                   if not value[column].map(lambda item: isinstance(item, list)).any()]
+        return {'type': 'frame', 'columns': [
+            [column, _save_column(directory, f'{name}.{i}', value[column])]
+            for i, column in enumerate(columns)
+        ]}
+    if isinstance(value, pd.Series):
+        return {
+            'type': 'series',
+            'index': _save_column(directory, f'{name}.index', value.index),
+            'values': _save_column(directory, f'{name}.values', value.values)
+        }
+    if isinstance(value, pd.Index):
+        return {'type': 'index', 'values': _save_column(directory, name, value)}
+    if isinstance(value, np.ndarray):
+        return {'type': 'array', 'file': _save_array(directory, name, value)}
+    raise TypeError(f"Cannot persist {name} of type {type(value).__name__}")
+
+def _read(directory, entry, mmap_mode):
+    kind = entry['type']
+    if kind == 'value':
+        return entry['value']
+    if kind == 'dict':
+        return {key: _read(directory, item, mmap_mode) for key, item in entry['items'].items()}
+    if kind == 'csr':
+        arrays = [_load_array(directory, entry[part], mmap_mode) for part in ('data', 'indices', 'indptr')]
+        return sp.csr_matrix(tuple(arrays), shape=tuple(entry['shape']), copy=False)
+    if kind == 'frame':
+        return pd.DataFrame({
+            column: _load_column(directory, column_entry, mmap_mode)
+            for column, column_entry in entry['columns']
+        })
+    if kind == 'series':
+        index = pd.Index(_load_column(directory, entry['index'], None))
+        return pd.Series(_load_column(directory, entry['values'], mmap_mode), index=index)
+    if kind == 'index':
+        values = _load_column(directory, entry['values'], None)
+        return pd.Index(np.asarray(values, dtype=object) if isinstance(values, pd.Categorical) else values)
+    if kind == 'array':
+        return _load_array(directory, entry['file'], mmap_mode)
+    raise ValueError(f"Unknown artifact entry type: {kind}")
+
+def save_state(state, root, config=None):
+    """Write ``state`` as a new version under ``root`` and point LATEST at it
+
+    Returns the version directory. The version is written to a temporary
+    directory first and renamed into place, so readers never see a partial
+    artifact.
+    """
+    os.makedirs(root, exist_ok=True)
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:4]}"
+    staging = os.path.join(root, f'.{version}.tmp')
+    os.makedirs(staging)
+    
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'config': config or {},
+        'state': {name: _write(staging, name, value) for name, value in state.items()}
+    }
+    with open(os.path.join(staging, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    
+    directory = os.path.join(root, version)
+    os.rename(staging, directory)
+    pointer = os.path.join(root, f'.{LATEST}.tmp')
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, LATEST))
+    return directory
+
+def resolve_version(path):
+    """Return the version directory for ``path`` (a version dir or an artifact root)"""
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        return path
+    latest = os.path.join(path, LATEST)
+    if not os.path.exists(latest):
+        raise FileNotFoundError(f"No artifact manifest or {LATEST} pointer in {path}")
+    with open(latest) as f:
+        return os.path.join(path, f.read().strip())
+
+def load_state(path, mmap_mode='r'):
+    """Read a saved state, memory-mapping arrays when ``mmap_mode`` is set
+
+    Returns ``(state, manifest)``.
+    """
+    directory = resolve_version(path)
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest['format_version'] != FORMAT_VERSION:
+        raise ValueError(
+            f"Artifact format {manifest['format_version']} is not supported (expected {FORMAT_VERSION})"
+        )
+    state = {name: _read(directory, entry, mmap_mode) for name, entry in manifest['state'].items()}
+    return state, manifest
@@ -0,0 +1,173 @@
+"""Benchmark the engine on synthetic data and compare runs across commits"""
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .loaders import peak_rss_bytes
+from .synthetic import generate_dataset, write_dataset
+
+DEFAULT_ALGORITHMS = ('content', 'tfidf', 'collaborative', 'item', 'als', 'hybrid')
+
+def _percentiles(seconds):
+    """Latency summary in milliseconds"""
+    ms = np.asarray(seconds) * 1000
+    return {
+        'count': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max())
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    """Library versions, machine and commit the results were measured on"""
+    import pandas
+    import scipy
+    import sklearn
+    
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'scipy': scipy.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+def run_benchmark(n_users=10_000, n_posts=2_000, density=0.005, n_tags=10, popularity_exponent=1.1,
+                  algorithms=DEFAULT_ALGORITHMS, queries=200, batch_users=1_000, n_recommendations=10,
+                  fmt='csv', data_dir=None, engine_params=None, seed=0):
+    """Time loading, preprocessing and every algorithm on a synthetic dataset
+
+    The dataset is written as ``fmt`` files (to ``data_dir`` or a temporary
+    directory) so ``load_data`` is timed end to end, file reads included.
+    Each algorithm is called once untimed to build its lazy indexes (reported
+    as ``first_call_seconds``), then timed over ``queries`` single-user calls
+    and one ``recommend_batch`` over ``batch_users`` users, both sampled
+    with ``seed``. Returns a JSON-serializable dict.
+    """
+    from .engine import ContentRecommendationSystem
+    
+    config = {
+        'n_users': n_users, 'n_posts': n_posts, 'density': density, 'n_tags': n_tags,
+        'popularity_exponent': popularity_exponent, 'algorithms': list(algorithms), 'queries': queries,
+        'batch_users': batch_users, 'n_recommendations': n_recommendations, 'fmt': fmt,
+        'engine_params': engine_params or {}, 'seed': seed
+    }
+    results = {'config': config, 'environment': environment()}
+    
+    start = time.perf_counter()
+    frames = generate_dataset(n_users, n_posts, density, n_tags, popularity_exponent, seed=seed)
+    dataset = {'generate_seconds': time.perf_counter() - start, 'engagements': len(frames[2])}
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = write_dataset(frames, data_dir or scratch, fmt)
+        del frames
+        # Latencies measure live scoring, so the result cache is off unless asked for
+        recommender = ContentRecommendationSystem(**{'result_cache_size': 0, **(engine_params or {})})
+        start = time.perf_counter()
+        if not recommender.load_data(*paths):
+            raise ValueError(f"Error loading data: {recommender.load_error}")
+        load_seconds = time.perf_counter() - start
+    read_seconds = sum(report['seconds'] for report in recommender.load_report.values())
+    results['dataset'] = dataset
+    results['load'] = {
+        'load_data_seconds': load_seconds,
+        'read_seconds': read_seconds,
+        'preprocess_seconds': load_seconds - read_seconds,
+        'peak_rss_bytes': peak_rss_bytes()
+    }
+    
+    rng = np.random.default_rng(seed)
+    user_ids = recommender.users_df['user_id'].values
+    # Users without engagements skip the neighbour and factor paths, so warm up with one that has some
+    warm_user = recommender.user_item_matrix.user_ids[0]
+    results['algorithms'] = {}
+    for algorithm in algorithms:
+        # First call builds lazy indexes (similarity, item neighbours, ALS factors)
+        start = time.perf_counter()
+        recommender.recommend(warm_user, algorithm, n_recommendations)
+        first_call = time.perf_counter() - start
+        
+        latencies = []
+        for user_id in rng.choice(user_ids, min(queries, len(user_ids)), replace=False):
+            start = time.perf_counter()
+            recommender.recommend(user_id, algorithm, n_recommendations)
+            latencies.append(time.perf_counter() - start)
+        
+        batch = rng.choice(user_ids, min(batch_users, len(user_ids)), replace=False)
+        start = time.perf_counter()
+        recommender.recommend_batch(batch, algorithm, n_recommendations)
+        batch_seconds = time.perf_counter() - start
+        results['algorithms'][algorithm] = {
+            'first_call_seconds': first_call,
+            'latency': _percentiles(latencies),
+            'batch_seconds': batch_seconds,
+            'batch_users_per_sec': len(batch) / max(batch_seconds, 1e-9),
+            'peak_rss_bytes': peak_rss_bytes()
+        }
+    
+    results['memory'] = {'peak_rss_bytes': peak_rss_bytes()}
+    results['memory']['model_bytes'] = recommender.memory_usage()
+    results['metrics'] = recommender.metrics.as_dict()
+    return results
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+# Metrics compared between runs; all are lower-is-better
+COMPARED_METRICS = (
+    ('load', 'load_data_seconds'),
+    ('load', 'preprocess_seconds'),
+    ('memory', 'peak_rss_bytes'),
+    ('memory', 'model_bytes')
+)
+
+def compare_results(baseline, current, tolerance=0.1):
+    """Rows of (metric, baseline, current, ratio, regressed) for two result dicts
+
+    A metric regresses when ``current`` exceeds ``baseline`` by more than
+    ``tolerance``. Per-algorithm p50/p99 latency and batch time are compared
+    for algorithms present in both runs.
+    """
+    pairs = [(f'{section}.{name}', baseline[section][name], current[section][name])
+             for section, name in COMPARED_METRICS]
+    for algorithm in baseline['algorithms']:
+        if algorithm not in current['algorithms']:
+            continue
+        old, new = baseline['algorithms'][algorithm], current['algorithms'][algorithm]
+        for name in ('p50_ms', 'p99_ms'):
+            pairs.append((f'{algorithm}.{name}', old['latency'][name], new['latency'][name]))
+        pairs.append((f'{algorithm}.batch_seconds', old['batch_seconds'], new['batch_seconds']))
+    
+    rows = []
+    for metric, old, new in pairs:
+        if old is None or new is None:
+            continue
+        ratio = new / old if old else float('inf') if new else 1.0
+        rows.append((metric, old, new, ratio, ratio > 1 + tolerance))
+    return rows
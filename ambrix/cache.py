@@ -0,0 +1,142 @@
+"""Per-user recommendation result cache with LRU eviction and a TTL"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """LRU cache of recommendation lists keyed by (user_id, algorithm, n, model version)
+
+    Entries expire ``ttl_seconds`` after they are stored, and the least
+    recently used entry is evicted beyond ``max_entries``. Each user's keys
+    are indexed so ``invalidate_users`` drops exactly that user's results.
+    A per-user generation makes ``put`` discard results computed before
+    the user was invalidated, so a request racing an ingest cannot store
+    a stale list. At most ``max_entries`` generations are kept; beyond
+    that, and on ``clear``, they are dropped and a global epoch is bumped
+    instead, which rejects every result computed before it.
+    """
+    
+    def __init__(self, max_entries=10_000, ttl_seconds=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._generations = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def _remove(self, key):
+        del self._entries[key]
+        keys = self._user_keys[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._user_keys[key[0]]
+    
+    def _reset_generations(self):
+        self._generations.clear()
+        self._epoch += 1
+    
+    def get(self, key):
+        """The cached value for ``key``, or None on a miss or an expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def generation(self, user_id):
+        """Token to pass to ``put`` for a result computed from now on"""
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+    
+    def put(self, key, value, generation=None):
+        """Store ``value`` unless its user was invalidated after ``generation`` was read"""
+        user_id = key[0]
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(user_id, 0)):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate_users(self, user_ids):
+        """Drop every cached result of ``user_ids``; returns the number of entries dropped"""
+        dropped = 0
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                for key in list(self._user_keys.get(user_id, ())):
+                    self._remove(key)
+                    dropped += 1
+            if len(self._generations) > self.max_entries:
+                self._reset_generations()
+            self.invalidations += dropped
+        return dropped
+    
+    def clear(self):
+        """Drop every entry, e.g. after a refit"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._user_keys.clear()
+            self._reset_generations()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'users': len(self._user_keys),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+def cached_result(algorithm):
+    """Method decorator serving ``(user_id, n_recommendations)`` calls from ``self.result_cache``
+
+    Callers get copies of the cached records, so mutating a returned list
+    does not change what later calls see.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, user_id, n_recommendations=3):
+            cache = self.result_cache
+            if cache is None:
+                return method(self, user_id, n_recommendations)
+            key = (user_id, algorithm, n_recommendations, self.model_version)
+            records = cache.get(key)
+            self.metrics.cache('results', records is not None)
+            if records is None:
+                generation = cache.generation(user_id)
+                records = method(self, user_id, n_recommendations)
+                cache.put(key, records, generation)
+            return [dict(record) for record in records]
+        return wrapper
+    return decorator
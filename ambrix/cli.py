@@ -0,0 +1,414 @@
+"""Command-line entry point: ``ambrix recommend --user U1 --algo hybrid``"""
+import argparse
+import json
+import os
+import sys
+
+ALGORITHMS = ('content', 'tfidf', 'collaborative', 'item', 'als', 'hybrid')
+
+def _add_data_arguments(parser):
+    parser.add_argument('--data-dir', default=os.environ.get('AMBRIX_DATA_DIR', '.'),
+                        help='Directory holding Users.csv, Posts.csv and Engagements.csv')
+    parser.add_argument('--users', help='Users CSV (default: <data-dir>/Users.csv)')
+    parser.add_argument('--posts', help='Posts CSV (default: <data-dir>/Posts.csv)')
+    parser.add_argument('--engagements', help='Engagements CSV (default: <data-dir>/Engagements.csv)')
+
+def _data_paths(args):
+    return (
+        args.users or os.path.join(args.data_dir, 'Users.csv'),
+        args.posts or os.path.join(args.data_dir, 'Posts.csv'),
+        args.engagements or os.path.join(args.data_dir, 'Engagements.csv'),
+    )
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ambrix', description='AMBRIX content recommendation engine')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    fit = commands.add_parser('fit', help='Fit the engine and write a versioned model artifact')
+    _add_data_arguments(fit)
+    fit.add_argument('--out', required=True, help='Artifact root directory')
+    
+    recommend = commands.add_parser('recommend', help='Recommend posts for one or more users')
+    _add_data_arguments(recommend)
+    recommend.add_argument('--artifacts', help='Load a fitted artifact instead of reading the CSVs')
+    recommend.add_argument('--tables', help='Serve from top-N tables written by `ambrix materialize`')
+    recommend.add_argument('--user', action='append', required=True, dest='user_ids',
+                           help='Target user id (repeat for several users)')
+    recommend.add_argument('--algo', choices=ALGORITHMS, default='hybrid', help='Recommendation algorithm')
+    recommend.add_argument('-n', '--n-recommendations', type=int, default=3, help='Recommendations per user')
+    recommend.add_argument('--format', choices=('table', 'json'), default='table', help='Output format')
+    recommend.add_argument('--hybrid-weight', action='append', metavar='COMPONENT=WEIGHT',
+                           help='Hybrid component weight, e.g. content=0.6 (repeat; replaces the defaults)')
+    recommend.add_argument('--normalization', choices=('minmax', 'zscore', 'rank', 'none'),
+                           help='Per-component score normalization before hybrid fusion')
+    recommend.add_argument('--profile', choices=('cprofile', 'pyinstrument'),
+                           help='Profile the recommendation call and print the report to stderr')
+    recommend.add_argument('--metrics', choices=('json', 'prometheus'),
+                           help='Print engine stage timings and counters to stderr')
+    
+    evaluate = commands.add_parser('evaluate', help='Hold out engagements and score every algorithm offline')
+    _add_data_arguments(evaluate)
+    evaluate.add_argument('--algo', action='append', choices=ALGORITHMS, dest='algorithms',
+                          help='Algorithm to evaluate (repeat; default: all)')
+    evaluate.add_argument('-k', type=int, default=10, help='Cutoff for precision/recall/NDCG/MAP')
+    evaluate.add_argument('--split', choices=('random', 'leave_last_out', 'time'), default='random',
+                          help='How held-out engagements are chosen')
+    evaluate.add_argument('--test-fraction', type=float, default=0.2, help='Held-out share for random/time splits')
+    evaluate.add_argument('--jobs', type=int, default=1, help='Worker processes for batch scoring')
+    evaluate.add_argument('--seed', type=int, default=0, help='Random split seed')
+    evaluate.add_argument('--out', help='Write the report JSON here')
+    
+    sweep = commands.add_parser('sweep', help='Grid or random search of engine parameters with a Pareto table')
+    _add_data_arguments(sweep)
+    sweep.add_argument('--algo', choices=ALGORITHMS, default='hybrid', help='Algorithm to tune')
+    sweep.add_argument('--weights', action='append', metavar='COMPONENT=WEIGHT,...',
+                       help='Hybrid weight set to try, e.g. content=0.6,collaborative=0.4 (repeat)')
+    sweep.add_argument('--normalization', nargs='+', choices=('minmax', 'zscore', 'rank', 'none'),
+                       help='Hybrid normalizations to try')
+    sweep.add_argument('--collaborative-neighbors', nargs='+', type=int, help='Neighbour counts to try')
+    sweep.add_argument('--item-neighbors', nargs='+', type=int, help='Item neighbour list lengths to try')
+    sweep.add_argument('--tfidf-max-features', nargs='+', type=int, help='TF-IDF vocabulary sizes to try')
+    sweep.add_argument('--search', choices=('grid', 'random'), default='grid', help='Search strategy')
+    sweep.add_argument('--trials', type=int, default=20, help='Trials drawn by random search')
+    sweep.add_argument('-k', type=int, default=10, help='Cutoff for the ranking metrics')
+    sweep.add_argument('--objective', choices=('precision', 'recall', 'ndcg', 'map'), default='ndcg',
+                       help='Quality metric of the Pareto table')
+    sweep.add_argument('--split', choices=('random', 'leave_last_out', 'time'), default='random',
+                       help='How held-out engagements are chosen')
+    sweep.add_argument('--test-fraction', type=float, default=0.2, help='Held-out share for random/time splits')
+    sweep.add_argument('--jobs', type=int, default=1, help='Worker processes running trials')
+    sweep.add_argument('--seed', type=int, default=0, help='Split and search seed')
+    sweep.add_argument('--out', help='Write every trial as CSV here')
+    
+    generate = commands.add_parser('generate', help='Write a synthetic Users/Posts/Engagements dataset')
+    _add_synthetic_arguments(generate)
+    generate.add_argument('--out', required=True, help='Output directory')
+    generate.add_argument('--timestamps', action='store_true', help='Add an engagement timestamp column')
+    
+    benchmark = commands.add_parser('benchmark', help='Benchmark loading and every algorithm on synthetic data')
+    _add_synthetic_arguments(benchmark)
+    benchmark.add_argument('--algo', action='append', choices=ALGORITHMS, dest='algorithms',
+                           help='Algorithm to benchmark (repeat; default: all)')
+    benchmark.add_argument('--queries', type=int, default=200, help='Single-user calls timed per algorithm')
+    benchmark.add_argument('--batch-users', type=int, default=1000, help='Users per timed recommend_batch call')
+    benchmark.add_argument('-n', '--n-recommendations', type=int, default=10, help='Recommendations per user')
+    benchmark.add_argument('--out', help='Write the results JSON here')
+    benchmark.add_argument('--baseline', help='Results JSON of an earlier run to compare against')
+    benchmark.add_argument('--tolerance', type=float, default=0.1,
+                           help='Relative slowdown reported as a regression (default 0.1)')
+    
+    serve = commands.add_parser('serve', help='Serve recommendations over HTTP with micro-batched scoring')
+    _add_data_arguments(serve)
+    serve.add_argument('--artifacts', help='Load a fitted artifact instead of reading the CSVs')
+    serve.add_argument('--tables', help='Serve from top-N tables written by `ambrix materialize`')
+    serve.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    serve.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    serve.add_argument('--max-batch-size', type=int, default=64,
+                       help='Most single-user requests scored in one batch call')
+    serve.add_argument('--max-wait-ms', type=float, default=2.0,
+                       help='Longest a request waits for others to join its batch')
+    serve.add_argument('--workers', type=int, default=1, help='Scoring threads')
+    
+    materialize = commands.add_parser('materialize', help='Precompute top-N tables for every user')
+    _add_data_arguments(materialize)
+    materialize.add_argument('--artifacts', help='Load a fitted artifact instead of reading the CSVs')
+    materialize.add_argument('--out', required=True, help='Table root directory')
+    materialize.add_argument('--algo', action='append', choices=ALGORITHMS, dest='algorithms',
+                             help='Algorithm to materialize (repeat; default: content, collaborative, hybrid)')
+    materialize.add_argument('-n', '--n-recommendations', type=int, default=50, help='Posts kept per user')
+    materialize.add_argument('--jobs', type=int, help='Scoring threads')
+    
+    loadtest = commands.add_parser('loadtest', help='Send requests to a running service at a target rate')
+    loadtest.add_argument('--url', default='http://127.0.0.1:8000', help='Service base URL')
+    loadtest.add_argument('--user', action='append', dest='user_ids', help='User id to request (repeat)')
+    loadtest.add_argument('--users-file', help='Users table whose user_id column supplies the request users')
+    loadtest.add_argument('--rps', type=float, default=100, help='Target requests per second')
+    loadtest.add_argument('--duration', type=float, default=10, help='Seconds to send requests for')
+    loadtest.add_argument('--endpoint', choices=('recommend', 'batch'), default='recommend',
+                          help='/recommend or /recommend/batch')
+    loadtest.add_argument('--algo', choices=ALGORITHMS, default='hybrid', help='Recommendation algorithm')
+    loadtest.add_argument('-n', '--n-recommendations', type=int, default=3, help='Recommendations per user')
+    loadtest.add_argument('--batch-size', type=int, default=32, help='Users per /recommend/batch request')
+    loadtest.add_argument('--connections', type=int, default=64, help='Most concurrent connections')
+    loadtest.add_argument('--seed', type=int, default=0, help='User sampling seed')
+    loadtest.add_argument('--out', help='Write the report JSON here')
+    return parser
+
+def _add_synthetic_arguments(parser):
+    parser.add_argument('--n-users', type=int, default=10_000, help='Number of users')
+    parser.add_argument('--n-posts', type=int, default=2_000, help='Number of posts')
+    parser.add_argument('--density', type=float, default=0.005, help='Engagements per (user, post) pair')
+    parser.add_argument('--n-tags', type=int, default=10, help='Tag vocabulary size')
+    parser.add_argument('--popularity-exponent', type=float, default=1.1, help='Power-law exponent of post popularity')
+    parser.add_argument('--format', choices=('csv', 'parquet', 'arrow'), default='csv', dest='fmt',
+                        help='File format written')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+def _fit(args):
+    from .engine import ContentRecommendationSystem
+    
+    recommender = ContentRecommendationSystem()
+    try:
+        version_dir = recommender.fit(*_data_paths(args), artifact_dir=args.out)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(version_dir)
+    return 0
+
+def _parse_weights(items):
+    """``COMPONENT=WEIGHT`` strings as a weights dict"""
+    weights = {}
+    for item in items:
+        name, _, weight = item.partition('=')
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid hybrid weight: {item}") from None
+    return weights
+
+def _configure_fusion(recommender, args):
+    weights = recommender.hybrid_weights
+    if args.hybrid_weight:
+        weights = _parse_weights(args.hybrid_weight)
+    normalization = args.normalization or recommender.hybrid_normalization
+    recommender.configure(hybrid_weights=weights, hybrid_normalization=normalization)
+
+def _load_recommender(args):
+    """The engine from ``--artifacts`` or the data files, with ``--tables`` attached; None after an error"""
+    # Deferred so `ambrix --help` does not pay for pandas/scipy imports
+    from .engine import ContentRecommendationSystem
+    
+    if args.artifacts:
+        recommender = ContentRecommendationSystem.load(args.artifacts)
+    else:
+        recommender = ContentRecommendationSystem()
+        if not recommender.load_data(*_data_paths(args)):
+            print(f"Error loading data: {recommender.load_error}", file=sys.stderr)
+            return None
+    if getattr(args, 'tables', None):
+        try:
+            recommender.load_topn_tables(args.tables)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return None
+    return recommender
+
+def _recommend(args):
+    recommender = _load_recommender(args)
+    if recommender is None:
+        return 1
+    
+    try:
+        _configure_fusion(recommender, args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    
+    if args.profile:
+        from .metrics import check_profiler, profiled
+        try:
+            check_profiler(args.profile)
+        except ImportError as e:
+            print(e, file=sys.stderr)
+            return 1
+        with profiled(args.profile) as profile:
+            _print_recommendations(recommender, args)
+        print(profile['report'], file=sys.stderr)
+    else:
+        _print_recommendations(recommender, args)
+    
+    if args.metrics == 'json':
+        print(json.dumps(recommender.metrics.as_dict(), indent=2), file=sys.stderr)
+    elif args.metrics == 'prometheus':
+        print(recommender.metrics.prometheus(), end='', file=sys.stderr)
+    return 0
+
+def _print_recommendations(recommender, args):
+    if len(args.user_ids) > 1:
+        results = recommender.recommend_batch(args.user_ids, args.algo, args.n_recommendations)
+        if args.format == 'json':
+            print(results.to_json(orient='records'))
+        else:
+            print(results.to_string(index=False))
+        return
+    
+    recommendations = recommender.recommend(args.user_ids[0], args.algo, args.n_recommendations)
+    if args.format == 'json':
+        print(json.dumps(recommendations, default=str))
+    else:
+        for rank, rec in enumerate(recommendations, 1):
+            print(f"{rank}. {rec['post_id']}  score={rec['score']:.3f}  "
+                  f"type={rec['content_type']}  tags={rec['tags']}  creator={rec['creator_id']}")
+
+def _evaluate(args):
+    from .evaluation import DEFAULT_ALGORITHMS, evaluate
+    from .loaders import read_table
+    
+    try:
+        frames = [read_table(path, table)[0]
+                  for path, table in zip(_data_paths(args), ('users', 'posts', 'engagements'))]
+        report = evaluate(*frames, algorithms=args.algorithms or DEFAULT_ALGORITHMS, k=args.k,
+                          strategy=args.split, test_fraction=args.test_fraction, seed=args.seed, n_jobs=args.jobs)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    split = report['split']
+    print(f"{split['users']:,} users, {split['relevant_pairs']:,} held-out likes, "
+          f"fit {report['fit_seconds']:.2f}s")
+    print(f"{'algorithm':<14}{'P@k':>8}{'R@k':>8}{'NDCG':>8}{'MAP':>8}{'cover':>8}{'novelty':>9}{'users/s':>10}")
+    for algorithm, metrics in report['algorithms'].items():
+        print(f"{algorithm:<14}{metrics['precision']:8.4f}{metrics['recall']:8.4f}{metrics['ndcg']:8.4f}"
+              f"{metrics['map']:8.4f}{metrics['coverage']:8.3f}{metrics['novelty']:9.2f}{metrics['users_per_sec']:10.0f}")
+    return 0
+
+def _sweep(args):
+    from .loaders import read_table
+    from .sweep import sweep
+    
+    space = {}
+    try:
+        if args.weights:
+            space['hybrid_weights'] = [_parse_weights(weights.split(',')) for weights in args.weights]
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for name in ('normalization', 'collaborative_neighbors', 'item_neighbors', 'tfidf_max_features'):
+        if getattr(args, name):
+            space['hybrid_normalization' if name == 'normalization' else name] = getattr(args, name)
+    if not space:
+        print("Nothing to sweep: pass --weights, --normalization or a neighbour/feature list", file=sys.stderr)
+        return 1
+    
+    try:
+        frames = [read_table(path, table)[0]
+                  for path, table in zip(_data_paths(args), ('users', 'posts', 'engagements'))]
+        results = sweep(*frames, space, algorithm=args.algo, search=args.search, n_trials=args.trials, k=args.k,
+                        strategy=args.split, test_fraction=args.test_fraction, seed=args.seed, n_jobs=args.jobs,
+                        objective=args.objective)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.out:
+        results.to_csv(args.out, index=False)
+    
+    columns = list(space) + [args.objective, 'coverage', 'p50_ms', 'p99_ms', 'batch_ms_per_user']
+    front = results[results['pareto']].sort_values('p50_ms')
+    print(f"{len(results)} trials, {len(front)} on the {args.objective} vs p50 latency Pareto front")
+    print(front[columns].to_string(index=False, float_format=lambda value: f'{value:.4f}'))
+    return 0
+
+def _generate(args):
+    from .synthetic import generate_dataset, write_dataset
+    
+    frames = generate_dataset(args.n_users, args.n_posts, args.density, args.n_tags, args.popularity_exponent,
+                              timestamps=args.timestamps, seed=args.seed)
+    for path in write_dataset(frames, args.out, args.fmt):
+        print(path)
+    return 0
+
+def _benchmark(args):
+    from .benchmark import DEFAULT_ALGORITHMS, compare_results, load_results, run_benchmark, save_results
+    
+    results = run_benchmark(
+        args.n_users, args.n_posts, args.density, args.n_tags, args.popularity_exponent,
+        algorithms=args.algorithms or DEFAULT_ALGORITHMS, queries=args.queries, batch_users=args.batch_users,
+        n_recommendations=args.n_recommendations, fmt=args.fmt, seed=args.seed
+    )
+    if args.out:
+        save_results(results, args.out)
+    
+    load = results['load']
+    print(f"load_data {load['load_data_seconds']:.3f}s  (read {load['read_seconds']:.3f}s, "
+          f"preprocess {load['preprocess_seconds']:.3f}s)")
+    for algorithm, timings in results['algorithms'].items():
+        latency = timings['latency']
+        print(f"{algorithm:<14} p50 {latency['p50_ms']:8.2f}ms  p99 {latency['p99_ms']:8.2f}ms  "
+              f"batch {timings['batch_users_per_sec']:10.0f} users/s  first call {timings['first_call_seconds']:.3f}s")
+    print(f"model {results['memory']['model_bytes'] / 2**20:.1f} MiB  "
+          f"peak RSS {(results['memory']['peak_rss_bytes'] or 0) / 2**20:.1f} MiB")
+    
+    if args.baseline:
+        rows = compare_results(load_results(args.baseline), results, args.tolerance)
+        for metric, old, new, ratio, regressed in rows:
+            print(f"{'REGRESSION' if regressed else 'ok':<10} {metric:<32} {old:12.4g} -> {new:12.4g}  x{ratio:.2f}")
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+def _serve(args):
+    import asyncio
+    
+    from .service import serve
+    
+    recommender = _load_recommender(args)
+    if recommender is None:
+        return 1
+    
+    print(f"Serving on http://{args.host}:{args.port} (max batch {args.max_batch_size}, "
+          f"max wait {args.max_wait_ms:g}ms)", file=sys.stderr)
+    try:
+        asyncio.run(serve(recommender, args.host, args.port, args.max_batch_size, args.max_wait_ms, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def _materialize(args):
+    from .toptables import MATERIALIZED_ALGORITHMS, materialize
+    
+    recommender = _load_recommender(args)
+    if recommender is None:
+        return 1
+    algorithms = args.algorithms or MATERIALIZED_ALGORITHMS
+    version_dir = materialize(recommender, args.out, algorithms, args.n_recommendations, n_jobs=args.jobs)
+    stages = recommender.metrics.as_dict()['stages']
+    for algorithm in algorithms:
+        print(f"{algorithm:<14} {len(recommender.user_vocab):,} users in "
+              f"{stages[f'materialize.{algorithm}']['total_seconds']:.2f}s", file=sys.stderr)
+    print(version_dir)
+    return 0
+
+def _loadtest(args):
+    from .loadtest import run_load_test
+    
+    user_ids = list(args.user_ids or [])
+    try:
+        if args.users_file:
+            from .loaders import read_table
+            
+            user_ids += list(read_table(args.users_file, 'users')[0]['user_id'].astype(str))
+        report = run_load_test(args.url, user_ids, args.rps, args.duration, args.endpoint, args.algo,
+                               args.n_recommendations, args.batch_size, args.connections, seed=args.seed)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    latency = report['latency']
+    print(f"{report['requests']:,} requests at {report['achieved_rps']:.1f}/s "
+          f"(target {args.rps:g}/s), {report['errors']:,} errors")
+    print(f"p50 {latency['p50_ms']:.2f}ms  p90 {latency['p90_ms']:.2f}ms  p99 {latency['p99_ms']:.2f}ms  "
+          f"max {latency['max_ms']:.2f}ms")
+    return 1 if report['errors'] else 0
+
+COMMANDS = {
+    'fit': _fit,
+    'recommend': _recommend,
+    'evaluate': _evaluate,
+    'sweep': _sweep,
+    'generate': _generate,
+    'benchmark': _benchmark,
+    'serve': _serve,
+    'materialize': _materialize,
+    'loadtest': _loadtest,
+}
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return COMMANDS[args.command](args)
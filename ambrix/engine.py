@@ -0,0 +1,1186 @@
+"""Headless recommendation engine"""
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from .cache import ResultCache, cached_result
+from .ids import IdVocabulary, code_lookup, grown
+from .interactions import (
+    EngagementIndex, InteractionMatrix, add_binary_pairs, binary_matrix, resized, split_tokens
+)
+from .loaders import DEFAULT_CHUNKSIZE, coerce_frame, read_table
+from .factorization import ALSModel
+from .fusion import check_fusion, fuse
+from .metrics import Metrics, timed_request
+from .popularity import PopularityIndex
+from .similarity import ItemSimilarityIndex, UserSimilarityIndex
+from .topk import top_k_positions, top_k_rows
+from .toptables import precomputed
+
+logger = logging.getLogger(__name__)
+
+def _timestamp_seconds(values):
+    """Timestamps as float epoch seconds; numeric columns are taken as epoch seconds"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64)
+    parsed = pd.to_datetime(values, errors='coerce', utc=True)
+    seconds = (parsed - pd.Timestamp(0, tz='UTC')).dt.total_seconds()
+    return seconds.to_numpy(dtype=np.float64, na_value=np.nan)
+
+def _nbytes(value):
+    """Approximate in-memory size of nested state values"""
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if sp.issparse(value):
+        return sum(getattr(value, part).nbytes for part in ('data', 'indices', 'indptr') if hasattr(value, part))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 0
+
+class ContentRecommendationSystem:
+    def __init__(self, similarity_mode='on_demand', neighbor_index='exact', neighbor_params=None,
+                 popularity_top_n=100, popularity_half_life_days=7.0,
+                 tfidf_max_features=100, tfidf_liked_weight=0.5, item_neighbors=20, als_params=None,
+                 hybrid_weights=None, hybrid_normalization='minmax', collaborative_neighbors=5,
+                 result_cache_size=10_000, result_cache_ttl=300.0, result_cache_warm_users=0):
+        self.users_df = None
+        self.posts_df = None
+        self.engagements_df = None
+        self.user_item_matrix = None
+        self.content_features = None
+        self.tfidf_max_features = tfidf_max_features
+        self.tfidf_liked_weight = tfidf_liked_weight
+        self.item_neighbors = item_neighbors
+        self.collaborative_neighbors = collaborative_neighbors
+        self.item_similarity = None
+        self.als_params = als_params
+        self.als_model = None
+        # Serializes lazy model builds when recommend_batch workers hit them at once
+        self._build_lock = threading.Lock()
+        self._tfidf = None
+        self.similarity_mode = similarity_mode
+        self.neighbor_index = neighbor_index
+        self.neighbor_params = neighbor_params
+        self.popularity_top_n = popularity_top_n
+        self.popularity_half_life_days = popularity_half_life_days
+        self.hybrid_weights = dict(hybrid_weights or self.DEFAULT_HYBRID_WEIGHTS)
+        self.hybrid_normalization = hybrid_normalization
+        check_fusion(self.hybrid_weights, hybrid_normalization, self.FUSION_COMPONENTS)
+        self.user_similarity = None
+        self.popularity = None
+        self.engagement_index = None
+        self._post_columns = None
+        self.load_error = None
+        self.load_report = {}
+        self.artifact_version = None
+        # Stage timers, counters and memory snapshots; see ambrix.metrics
+        self.metrics = Metrics()
+        # Per-user results of the single-user methods; a refit bumps model_version and clears it
+        self.result_cache_size = result_cache_size
+        self.result_cache_ttl = result_cache_ttl
+        self.result_cache_warm_users = result_cache_warm_users
+        self.model_version = 0
+        self.result_cache = self._new_result_cache()
+        # Materialized top-N tables (see ambrix.toptables) and the user codes ingested since
+        self.topn_tables = {}
+        self.topn_n = 0
+        self._topn_stale = None
+    
+    @property
+    def engagements_df(self):
+        # Ingested batches are concatenated on first read rather than per batch
+        if self._pending_engagements:
+            self._engagements_df = pd.concat(
+                [self._engagements_df, *self._pending_engagements], ignore_index=True
+            )
+            self._pending_engagements = []
+        return self._engagements_df
+    
+    @engagements_df.setter
+    def engagements_df(self, value):
+        self._engagements_df = value
+        self._pending_engagements = []
+    
+    def load_data(self, users_file, posts_file, engagements_file, chunksize=DEFAULT_CHUNKSIZE):
+        """Load and process the uploaded data files
+
+        Files may be CSV, Parquet or Arrow IPC (see ``loaders.read_table``).
+        Returns False on failure and keeps the message in ``load_error`` so
+        callers without a UI can report it themselves. Per-table throughput
+        and peak memory are kept in ``load_report``.
+        """
+        self.load_error = None
+        self.load_report = {}
+        try:
+            sources = {'users': users_file, 'posts': posts_file, 'engagements': engagements_file}
+            frames = {}
+            for table, source in sources.items():
+                with self.metrics.stage(f'load.{table}'):
+                    frames[table], self.load_report[table] = read_table(source, table, chunksize=chunksize)
+            
+            # Clean and preprocess data
+            self.load_frames(frames['users'], frames['posts'], frames['engagements'])
+            return True
+        except Exception as e:
+            logger.debug("Error loading data", exc_info=True)
+            self.load_error = str(e)
+            return False
+    
+    def load_frames(self, users_df, posts_df, engagements_df):
+        """Preprocess tables that are already in memory, e.g. a train split
+
+        Frames should have the dtypes ``read_table`` produces. Unlike
+        ``load_data`` this raises on bad input.
+        """
+        self.users_df = users_df
+        self.posts_df = posts_df
+        self.engagements_df = engagements_df
+        with self.metrics.stage('preprocess'):
+            self._preprocess_data()
+        self.metrics.snapshot_memory('load')
+        if self.result_cache_warm_users:
+            with self.metrics.stage('warm_result_cache'):
+                self.warm_result_cache(self.result_cache_warm_users)
+    
+    def fit(self, users_file, posts_file, engagements_file, artifact_dir=None):
+        """Load and preprocess the data, optionally writing a model artifact
+
+        Unlike ``load_data`` this raises on bad input. Returns the artifact
+        version directory when ``artifact_dir`` is given.
+        """
+        if not self.load_data(users_file, posts_file, engagements_file):
+            raise ValueError(f"Error loading data: {self.load_error}")
+        if artifact_dir is not None:
+            return self.save(artifact_dir)
+    
+    # Plain attributes persisted by save(); id vocabularies, interaction matrix,
+    # engagement index and similarity index are persisted through their own state()
+    PERSISTED_ATTRIBUTES = (
+        'users_df', 'posts_df', 'engagements_df', 'content_features',
+        'tfidf_vocabulary', 'tfidf_idf', 'user_interest_features',
+        'user_row_codes', 'user_code_rows', 'user_code_positions',
+        'post_row_codes', 'post_code_first_row',
+        'user_tag_matrix', 'post_tag_matrix',
+        'seen_matrix', 'liked_matrix',
+        'post_engagement_counts', 'post_like_counts',
+        'post_popularity', 'popularity_reference_time'
+    )
+    
+    VOCABULARIES = ('user_vocab', 'post_vocab', 'tag_vocab')
+    
+    # Models built on first use, with the getter that builds them
+    LAZY_MODELS = {
+        'user_similarity': 'get_user_similarity',
+        'popularity': 'get_popularity',
+        'item_similarity': 'get_item_similarity',
+        'als_model': 'get_als_model'
+    }
+    
+    def config(self):
+        return {
+            'similarity_mode': self.similarity_mode,
+            'neighbor_index': self.neighbor_index,
+            'neighbor_params': self.neighbor_params,
+            'popularity_top_n': self.popularity_top_n,
+            'popularity_half_life_days': self.popularity_half_life_days,
+            'tfidf_max_features': self.tfidf_max_features,
+            'tfidf_liked_weight': self.tfidf_liked_weight,
+            'item_neighbors': self.item_neighbors,
+            'als_params': self.als_params,
+            'hybrid_weights': self.hybrid_weights,
+            'hybrid_normalization': self.hybrid_normalization,
+            'collaborative_neighbors': self.collaborative_neighbors,
+            'result_cache_size': self.result_cache_size,
+            'result_cache_ttl': self.result_cache_ttl,
+            'result_cache_warm_users': self.result_cache_warm_users
+        }
+    
+    # Structures to rebuild when a config parameter changes on a fitted engine
+    RECONFIGURE = {
+        'similarity_mode': 'user_similarity',
+        'neighbor_index': 'user_similarity',
+        'neighbor_params': 'user_similarity',
+        'popularity_top_n': 'popularity',
+        'tfidf_max_features': 'tfidf',
+        'item_neighbors': 'item_similarity',
+        'als_params': 'als_model',
+        'result_cache_size': 'result_cache',
+        'result_cache_ttl': 'result_cache'
+    }
+    
+    def configure(self, **params):
+        """Change config parameters of a fitted engine, rebuilding only what they affect
+
+        Serving parameters (hybrid weights and normalization, neighbour
+        counts, the TF-IDF liked weight) take effect on the next request;
+        changed index parameters drop or rebuild their index. Any change
+        other than the result cache settings starts a new model version, so
+        cached results and top-N tables are not reused. The popularity
+        half-life is baked into the counters and needs a full refit.
+        """
+        unknown = [name for name in params if name not in self.config()]
+        if unknown:
+            raise ValueError(f"Unknown parameter(s): {', '.join(unknown)}")
+        if 'popularity_half_life_days' in params:
+            raise ValueError("popularity_half_life_days can only be changed by refitting")
+        check_fusion(
+            params.get('hybrid_weights', self.hybrid_weights),
+            params.get('hybrid_normalization', self.hybrid_normalization),
+            self.FUSION_COMPONENTS
+        )
+        changed = {name for name, value in params.items() if getattr(self, name) != value}
+        for name in changed:
+            setattr(self, name, dict(params[name]) if name == 'hybrid_weights' else params[name])
+        stale = {self.RECONFIGURE[name] for name in changed if name in self.RECONFIGURE}
+        if 'tfidf' in stale and self.posts_df is not None:
+            self._build_tfidf_index()
+        if 'result_cache' in stale:
+            self.result_cache = self._new_result_cache()
+        for name in stale - {'tfidf', 'result_cache'}:
+            setattr(self, name, None)
+        if changed - {'result_cache_size', 'result_cache_ttl', 'result_cache_warm_users'}:
+            self._new_model_version()
+    
+    def _new_result_cache(self):
+        if not self.result_cache_size:
+            return None
+        return ResultCache(self.result_cache_size, self.result_cache_ttl)
+    
+    def _new_model_version(self):
+        """Start a new model version; cached results and top-N tables of the previous one are dropped"""
+        self.model_version += 1
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        self.topn_tables = {}
+        self.topn_n = 0
+        self._topn_stale = None
+    
+    def load_topn_tables(self, path, mmap_mode='r'):
+        """Serve requests for up to ``n`` posts from tables written by ``toptables.materialize``
+
+        Arrays are memory-mapped. Users ingested afterwards, and users the
+        tables do not cover, are scored live. Raises ValueError when the
+        tables were built with a different config or different ids.
+        """
+        from .toptables import load_tables
+        tables, config = load_tables(self, path, mmap_mode)
+        self.topn_tables = tables
+        self.topn_n = config['n']
+        self._topn_stale = np.zeros(config['users'], dtype=bool)
+        return config
+    
+    def _fresh_table_users(self, algorithm, user_codes, n):
+        """Mask of ``user_codes`` whose ``algorithm`` table entry can serve ``n`` posts"""
+        table = self.topn_tables.get(algorithm)
+        fresh = np.zeros(len(user_codes), dtype=bool)
+        if table is not None and n <= self.topn_n:
+            fresh = (user_codes >= 0) & (user_codes < table.n_users)
+            fresh[fresh] = ~self._topn_stale[user_codes[fresh]]
+        self.metrics.count('topn_served', fresh.sum())
+        self.metrics.count('topn_fallbacks', len(fresh) - fresh.sum())
+        return fresh
+    
+    def _table_records(self, algorithm, user_id, n):
+        """Recommendation dicts from the ``algorithm`` table, or None when the user must be scored live"""
+        code = self.user_vocab.code(user_id)
+        if not self._fresh_table_users(algorithm, np.array([code]), n)[0]:
+            return None
+        post_codes, scores = self.topn_tables[algorithm].lookup(code, n)
+        post_rows, scores = self.post_code_first_row[post_codes], self._table_scores(algorithm, [user_id], scores)
+        return [self._post_record(row, score.item()) for row, score in zip(post_rows, scores)]
+    
+    def _table_scores(self, algorithm, user_ids, scores):
+        """Cast float32 table scores to the dtype live scoring returns for ``user_ids``"""
+        # Content scores are integers, except popularity scores for users without a profile
+        if algorithm == 'content' and (self._user_rows(user_ids) >= 0).all():
+            return scores.astype(np.int64)
+        return scores.astype(np.float64)
+    
+    def _table_batch(self, algorithm, score_chunk, user_ids, n_recommendations):
+        """Columnar results with fresh users read from the table and the rest scored live"""
+        codes = self.user_vocab.encode(user_ids)
+        fresh = self._fresh_table_users(algorithm, codes, n_recommendations)
+        served = np.flatnonzero(fresh)
+        user_index, ranks, post_codes, scores = self.topn_tables[algorithm].gather(codes[served], n_recommendations)
+        scores = self._table_scores(algorithm, user_ids[served], scores)
+        parts = [(served[user_index], ranks, self.post_code_first_row[post_codes], scores)]
+        live = np.flatnonzero(~fresh)
+        if len(live):
+            user_index, ranks, post_rows, scores = score_chunk(user_ids[live], n_recommendations)
+            parts.append((live[user_index], ranks, post_rows, scores))
+        user_index, ranks, post_rows, scores = (np.concatenate(column) for column in zip(*parts))
+        order = np.argsort(user_index, kind='stable')
+        return user_index[order], ranks[order], post_rows[order], scores[order]
+    
+    def warm_result_cache(self, n_users=100, algorithms=('hybrid',), n_recommendations=3):
+        """Cache results for the ``n_users`` users with the most engaged posts; returns the users warmed"""
+        if self.result_cache is None or not n_users:
+            return []
+        activity = np.diff(self.seen_matrix.indptr)
+        positions = np.argsort(-activity, kind='stable')[:min(n_users, len(activity))]
+        user_ids = list(self.user_item_matrix.user_ids[positions])
+        for algorithm in algorithms:
+            for user_id in user_ids:
+                self.recommend(user_id, algorithm, n_recommendations)
+        return user_ids
+    
+    def state(self, build=True):
+        """Return every fitted structure as a nested dict of arrays and frames
+        
+        With ``build=False`` lazy models that have not been built yet are
+        left out instead of being built.
+        """
+        state = {name: getattr(self, name) for name in self.PERSISTED_ATTRIBUTES}
+        for name in self.VOCABULARIES:
+            state[name] = getattr(self, name).state()
+        state['user_item_matrix'] = self.user_item_matrix.state()
+        state['engagement_index'] = self.engagement_index.state()
+        for name, getter in self.LAZY_MODELS.items():
+            model = getattr(self, getter)() if build else getattr(self, name)
+            if model is not None:
+                state[name] = model.state()
+        return state
+    
+    def memory_usage(self):
+        """Approximate bytes held by the structures built so far"""
+        return _nbytes(self.state(build=False))
+    
+    def save(self, artifact_dir, build=True):
+        """Write the fitted model as a new artifact version under ``artifact_dir``
+
+        With ``build=False`` only lazy models built so far are written; the
+        loaded engine builds the rest on first use.
+        """
+        from .artifacts import save_state
+        return save_state(self.state(build), artifact_dir, self.config())
+    
+    @classmethod
+    def load(cls, artifact_dir, mmap_mode='r'):
+        """Load a fitted model from an artifact, memory-mapping its arrays"""
+        from .artifacts import load_state
+        state, manifest = load_state(artifact_dir, mmap_mode)
+        recommender = cls(**manifest['config'])
+        for name in cls.PERSISTED_ATTRIBUTES:
+            setattr(recommender, name, state[name])
+        for name in cls.VOCABULARIES:
+            setattr(recommender, name, IdVocabulary.from_state(state[name]))
+        recommender.user_item_matrix = InteractionMatrix.from_state(state['user_item_matrix'])
+        recommender.engagement_index = EngagementIndex.from_state(state['engagement_index'])
+        # Lazy models saved unbuilt stay None and are built on first use
+        if 'user_similarity' in state:
+            recommender.user_similarity = UserSimilarityIndex.from_state(
+                state['user_similarity'], recommender.user_item_matrix
+            )
+        if 'popularity' in state:
+            recommender.popularity = PopularityIndex.from_state(state['popularity'])
+        if 'item_similarity' in state:
+            recommender.item_similarity = ItemSimilarityIndex.from_state(state['item_similarity'])
+        if 'als_model' in state:
+            recommender.als_model = ALSModel.from_state(state['als_model'])
+        recommender.artifact_version = manifest['version']
+        return recommender
+    
+    def _preprocess_data(self):
+        """Preprocess the loaded data"""
+        self._new_model_version()
+        self.invalidate_similarity()
+        self.popularity = None
+        self.als_model = None
+        self._post_columns = None
+        
+        # Intern ids to dense int32 codes; profile and catalog ids are coded first
+        with self.metrics.stage('preprocess.vocabularies'):
+            self._build_vocabularies()
+            user_codes = self.user_vocab.extend(self.engagements_df['user_id'])
+            post_codes = self.post_vocab.extend(self.engagements_df['post_id'])
+        engagement = self.engagements_df['engagement'].values
+        self.metrics.count('engagements_scanned', len(engagement))
+        
+        # Create user-item interaction matrix
+        with self.metrics.stage('preprocess.interactions'):
+            self.user_item_matrix = InteractionMatrix.from_codes(
+                user_codes, post_codes, engagement, self.user_vocab, self.post_vocab
+            )
+        self.user_code_positions = code_lookup(
+            self.user_vocab.encode(self.user_item_matrix.user_ids), len(self.user_vocab)
+        )
+        self.user_code_rows = grown(self.user_code_rows, len(self.user_vocab))
+        self.post_code_first_row = grown(self.post_code_first_row, len(self.post_vocab))
+        
+        # TF-IDF features for posts and user interests
+        with self.metrics.stage('preprocess.tfidf'):
+            self._build_tfidf_index()
+        
+        # Per-user seen/disliked flags over every known user and post code
+        with self.metrics.stage('preprocess.engagement_index'):
+            self.engagement_index = EngagementIndex(
+                user_codes, post_codes, engagement, (len(self.user_vocab), len(self.post_vocab))
+            )
+        
+        # Sparse tag matrices for content scoring
+        with self.metrics.stage('preprocess.content_index'):
+            self._build_content_index()
+        
+        # Liked/seen matrices for vectorized collaborative scoring
+        with self.metrics.stage('preprocess.collaborative_index'):
+            self._build_collaborative_index(user_codes, post_codes, engagement)
+        
+        # Per-post counters and cold-start popularity rankings
+        with self.metrics.stage('preprocess.popularity'):
+            self._build_popularity_counters(post_codes, engagement)
+        self.get_popularity()
+        
+        # Build the user similarity index once per dataset
+        self.get_user_similarity()
+    
+    def _build_vocabularies(self):
+        """Intern user and post ids and map codes to their first rows"""
+        # First row wins for duplicated ids, as with .iloc[0]
+        self.user_vocab = IdVocabulary(self.users_df['user_id'])
+        self.user_row_codes = self.user_vocab.encode(self.users_df['user_id'])
+        self.user_code_rows = code_lookup(self.user_row_codes, len(self.user_vocab))
+        
+        # Posts rows sharing a post_id share one code
+        self.post_vocab = IdVocabulary(self.posts_df['post_id'])
+        self.post_row_codes = self.post_vocab.encode(self.posts_df['post_id'])
+        self.post_code_first_row = code_lookup(self.post_row_codes, len(self.post_vocab))
+    
+    def _user_rows(self, user_ids):
+        """users_df rows of ``user_ids``, -1 for users without a profile"""
+        codes = self.user_vocab.encode(user_ids)
+        return np.where(codes >= 0, self.user_code_rows[codes], -1)
+    
+    def _interaction_positions(self, user_ids):
+        """Interaction matrix rows of ``user_ids``, -1 for users without engagements"""
+        codes = self.user_vocab.encode(user_ids)
+        return np.where(codes >= 0, self.user_code_positions[codes], -1)
+    
+    def _build_tfidf_index(self):
+        """Fit the TF-IDF vectorizer on post tags once and project user interests into it"""
+        self._tfidf = None
+        self.tfidf_vocabulary = pd.Index([], dtype=object)
+        self.tfidf_idf = np.empty(0)
+        self.content_features = sp.csr_matrix((len(self.posts_df), 0))
+        if 'tags' in self.posts_df.columns:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            tfidf = TfidfVectorizer(stop_words='english', max_features=self.tfidf_max_features)
+            tags_text = self.posts_df['tags'].astype(object).fillna('')
+            try:
+                self.content_features = tfidf.fit_transform(tags_text)
+            except ValueError:
+                # Every tag is empty or a stop word: keep the empty vocabulary
+                tfidf = None
+            if tfidf is not None:
+                self.tfidf_vocabulary = pd.Index(tfidf.get_feature_names_out(), dtype=object)
+                self.tfidf_idf = tfidf.idf_
+                self._tfidf = tfidf
+        
+        interests = self.users_df.get('top_3_interests', pd.Series('', index=self.users_df.index))
+        self.user_interest_features = self.tfidf_transform(interests.astype(object).fillna(''))
+    
+    def tfidf_transform(self, texts):
+        """Project tag or interest strings into the fitted TF-IDF space"""
+        if len(self.tfidf_vocabulary) == 0:
+            return sp.csr_matrix((len(texts), 0))
+        if self._tfidf is None:
+            # Rebuilt from the persisted vocabulary and idf weights after load()
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            tfidf = TfidfVectorizer(stop_words='english', vocabulary=np.asarray(self.tfidf_vocabulary))
+            tfidf.idf_ = np.asarray(self.tfidf_idf)
+            self._tfidf = tfidf
+        return self._tfidf.transform(texts)
+    
+    def _build_content_index(self):
+        """Build the user×tag and post×tag matrices"""
+        user_tags = split_tokens(self.users_df, 'top_3_interests')
+        post_tags = split_tokens(self.posts_df, 'tags')
+        self.tag_vocab = IdVocabulary(pd.concat([user_tags, post_tags]))
+        self.user_tag_matrix = binary_matrix(
+            user_tags.index.values, self.tag_vocab.encode(user_tags.values),
+            (len(self.users_df), len(self.tag_vocab))
+        )
+        self.post_tag_matrix = binary_matrix(
+            post_tags.index.values, self.tag_vocab.encode(post_tags.values),
+            (len(self.posts_df), len(self.tag_vocab))
+        )
+    
+    def _build_collaborative_index(self, user_codes, post_codes, engagement):
+        """Build interaction-user × posts_df-row liked and seen matrices"""
+        # Candidates resolve to the first posts_df row of each post_id, as with .iloc[0]
+        rows = self.user_code_positions[user_codes]
+        cols = self.post_code_first_row[post_codes]
+        known = (rows >= 0) & (cols >= 0)
+        rows, cols = rows[known], cols[known]
+        liked = engagement[known] == 1
+        shape = (len(self.user_item_matrix.user_ids), len(self.posts_df))
+        self.seen_matrix = binary_matrix(rows, cols, shape)
+        self.liked_matrix = binary_matrix(rows[liked], cols[liked], shape)
+    
+    def _build_popularity_counters(self, post_codes, engagement):
+        """Count engagements and likes per posts_df row"""
+        cols = self.post_code_first_row[post_codes]
+        known = cols >= 0
+        cols = cols[known]
+        liked = engagement[known] == 1
+        self.post_engagement_counts = np.bincount(cols, minlength=len(self.posts_df))
+        self.post_like_counts = np.bincount(cols[liked], minlength=len(self.posts_df))
+        
+        # Likes decay with age when engagements carry a timestamp
+        self.popularity_reference_time = None
+        weights = np.ones(len(cols))
+        if 'timestamp' in self.engagements_df.columns and self.popularity_half_life_days:
+            seconds = _timestamp_seconds(self.engagements_df['timestamp'])[known]
+            if np.isfinite(seconds).any():
+                self.popularity_reference_time = float(np.nanmax(seconds))
+                weights = self._decay_weights(seconds)
+        self.post_popularity = np.bincount(cols[liked], weights=weights[liked], minlength=len(self.posts_df))
+    
+    def _decay_weights(self, seconds):
+        """Half-life weights relative to the reference time; undated events weigh 1"""
+        half_life = self.popularity_half_life_days * 86400
+        age = self.popularity_reference_time - np.nan_to_num(seconds, nan=self.popularity_reference_time)
+        return np.power(0.5, age / half_life)
+    
+    def get_popularity(self):
+        """Return the popularity rankings, rebuilding them from the counters if stale"""
+        self.metrics.cache('popularity', self.popularity is not None)
+        if self.popularity is None:
+            eligible = np.zeros(len(self.posts_df), dtype=bool)
+            eligible[self.post_code_first_row[self.post_code_first_row >= 0]] = True
+            content_types = self.posts_df['content_type'].values if 'content_type' in self.posts_df.columns else None
+            with self.metrics.stage('build.popularity'):
+                self.popularity = PopularityIndex(
+                    self.post_popularity, eligible, content_types,
+                    self.post_tag_matrix, self.tag_vocab.ids, self.popularity_top_n
+                )
+        return self.popularity
+    
+    ENGAGEMENT_COLUMNS = ('user_id', 'post_id', 'engagement', 'timestamp')
+    
+    def ingest_engagements(self, batch):
+        """Apply a batch of new engagements in place, without a full rebuild
+
+        ``batch`` is anything ``pd.DataFrame`` accepts (a DataFrame, a dict of
+        columns, row dicts, or rows in user_id, post_id, engagement, timestamp
+        order) with an optional timestamp; it is checked like a loaded
+        engagements table and raises ``SchemaError`` on bad values. Work is proportional to the
+        batch: the interaction means, seen/liked/disliked lookups and
+        popularity counters are updated for the touched pairs only, touched
+        users are renormalized, and the neighbour index marks them stale
+        instead of being rebuilt. Users and posts unknown to users_df/posts_df
+        only enter the interaction matrix.
+        """
+        # Every batch shape goes through one DataFrame, so list-of-dict batches keep their timestamps
+        batch = pd.DataFrame(batch)
+        if isinstance(batch.columns, pd.RangeIndex) and len(batch.columns) <= len(self.ENGAGEMENT_COLUMNS):
+            # Arrays and tuples without column names are read positionally
+            batch.columns = list(self.ENGAGEMENT_COLUMNS[:len(batch.columns)])
+        batch = coerce_frame(batch, 'engagements')
+        batch = batch[[column for column in self.ENGAGEMENT_COLUMNS if column in batch.columns]]
+        n_users_before = self.user_item_matrix.shape[0]
+        self._pending_engagements.append(batch)
+        self.metrics.count('engagements_scanned', len(batch))
+        
+        # New ids get fresh codes; code-indexed lookups grow with -1 for them
+        user_codes = self.user_vocab.extend(batch['user_id'])
+        post_codes = self.post_vocab.extend(batch['post_id'])
+        self.user_code_rows = grown(self.user_code_rows, len(self.user_vocab))
+        self.user_code_positions = grown(self.user_code_positions, len(self.user_vocab))
+        self.post_code_first_row = grown(self.post_code_first_row, len(self.post_vocab))
+        
+        with self.metrics.stage('ingest.interactions'):
+            touched = self.user_item_matrix.update(batch)
+        if not self.user_code_positions.flags.writeable:
+            self.user_code_positions = np.array(self.user_code_positions)
+        self.user_code_positions[user_codes] = self.user_item_matrix.user_ids.get_indexer(batch['user_id'])
+        with self.metrics.stage('ingest.lookups'):
+            self._ingest_lookups(batch, user_codes, post_codes)
+        with self.metrics.stage('ingest.similarity'):
+            self.get_user_similarity().update_users(touched)
+        if self.als_model is not None:
+            # Touched and new users are re-solved against the fixed post factors
+            with self.metrics.stage('ingest.als'):
+                self.als_model.update_users(touched, self._als_interactions(touched))
+        if self.result_cache is not None:
+            # Only the batch's users are dropped; other users' results refresh within the cache TTL
+            self.result_cache.invalidate_users(pd.unique(batch['user_id']))
+        if self._topn_stale is not None:
+            self._topn_stale[user_codes[(user_codes >= 0) & (user_codes < len(self._topn_stale))]] = True
+        return {
+            'engagements': len(batch),
+            'touched_users': len(touched),
+            'new_users': self.user_item_matrix.shape[0] - n_users_before
+        }
+    
+    def _ingest_lookups(self, batch, user_codes, post_codes):
+        """Fold a batch into the engagement index, seen/liked and counter structures"""
+        engagement = batch['engagement'].values
+        
+        # Seen/disliked flags: the first engagement of a pair wins, so only new pairs are added
+        self.engagement_index.update(
+            user_codes, post_codes, engagement, (len(self.user_vocab), len(self.post_vocab))
+        )
+        
+        # Seen/liked rows follow the interaction matrix, which may have grown
+        shape = (self.user_item_matrix.shape[0], len(self.posts_df))
+        rows = self.user_code_positions[user_codes]
+        cols = self.post_code_first_row[post_codes]
+        known = (rows >= 0) & (cols >= 0)
+        rows, cols = rows[known], cols[known]
+        liked = engagement[known] == 1
+        self.seen_matrix = add_binary_pairs(resized(self.seen_matrix, shape), rows, cols)
+        self.liked_matrix = add_binary_pairs(resized(self.liked_matrix, shape), rows[liked], cols[liked])
+        
+        # Counters are read-only memory maps after load(); copy once before writing
+        if not self.post_engagement_counts.flags.writeable:
+            self.post_engagement_counts = np.array(self.post_engagement_counts)
+            self.post_like_counts = np.array(self.post_like_counts)
+            self.post_popularity = np.array(self.post_popularity)
+        np.add.at(self.post_engagement_counts, cols, 1)
+        np.add.at(self.post_like_counts, cols[liked], 1)
+        weights = np.ones(len(cols))
+        if self.popularity_reference_time is not None and 'timestamp' in batch.columns:
+            weights = self._decay_weights(_timestamp_seconds(batch['timestamp'])[known])
+        np.add.at(self.post_popularity, cols[liked], weights[liked])
+        
+        # Rankings are rebuilt from the counters on the next cold-start request,
+        # item neighbour lists from the liked matrix on the next item-based one
+        self.popularity = None
+        self.item_similarity = None
+    
+    def invalidate_similarity(self):
+        """Drop the cached user and item similarity indexes so they are rebuilt on next use"""
+        self.user_similarity = None
+        self.item_similarity = None
+    
+    def get_user_similarity(self):
+        """Return the cached user similarity index, building it if needed"""
+        self.metrics.cache('user_similarity', self.user_similarity is not None)
+        if self.user_similarity is None:
+            with self.metrics.stage('build.user_similarity'):
+                self.user_similarity = UserSimilarityIndex(
+                    self.user_item_matrix, self.similarity_mode,
+                    self.neighbor_index, self.neighbor_params
+                )
+            self.metrics.snapshot_memory('user_similarity')
+        return self.user_similarity
+    
+    def get_item_similarity(self):
+        """Return the cached item neighbour lists, building them from the liked matrix if needed"""
+        with self._build_lock:
+            self.metrics.cache('item_similarity', self.item_similarity is not None)
+            if self.item_similarity is None:
+                with self.metrics.stage('build.item_similarity'):
+                    self.item_similarity = ItemSimilarityIndex(self.liked_matrix, self.item_neighbors)
+                self.metrics.snapshot_memory('item_similarity')
+        return self.item_similarity
+    
+    def _als_interactions(self, positions=None):
+        """Like counts of interaction users (all, or ``positions``) per posts_df row"""
+        matrix = self.user_item_matrix
+        csr, counts = matrix.csr, matrix.counts
+        if positions is not None:
+            csr, counts = csr[positions], counts[positions]
+        likes = sp.csr_matrix(csr.multiply(counts))
+        rows = self.post_code_first_row[self.post_vocab.encode(matrix.post_ids)]
+        catalog = np.flatnonzero(rows >= 0)
+        return likes @ binary_matrix(catalog, rows[catalog], (len(rows), len(self.posts_df)))
+    
+    def get_als_model(self):
+        """Return the ALS factor model, training it on the interaction matrix if needed"""
+        with self._build_lock:
+            self.metrics.cache('als_model', self.als_model is not None)
+            if self.als_model is None:
+                with self.metrics.stage('build.als_model'):
+                    self.als_model = ALSModel(self._als_interactions(), **(self.als_params or {}))
+                self.metrics.snapshot_memory('als_model')
+        return self.als_model
+    
+    def calculate_user_similarity(self):
+        """Calculate user-user similarity based on engagement patterns"""
+        return self.get_user_similarity().to_frame()
+    
+    ALGORITHMS = {
+        'content': 'content_based_recommendations',
+        'tfidf': 'tfidf_recommendations',
+        'collaborative': 'collaborative_filtering_recommendations',
+        'item': 'item_based_recommendations',
+        'als': 'als_recommendations',
+        'hybrid': 'hybrid_recommendations'
+    }
+    
+    def recommend(self, user_id, algorithm='hybrid', n_recommendations=3):
+        """Generate recommendations for one user with the named algorithm"""
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        return getattr(self, self.ALGORITHMS[algorithm])(user_id, n_recommendations)
+    
+    @timed_request('popularity')
+    def popularity_recommendations(self, n_recommendations=3, content_type=None, tag=None):
+        """Return the most popular posts overall, for a content type or for a tag"""
+        post_rows, scores = self.get_popularity().top(n_recommendations, content_type, tag)
+        return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+    
+    def _cold_start_top_k(self, user_id, k):
+        """Popular posts for a user without history, matched to their interests when known"""
+        user_row = self._user_rows([user_id])[0]
+        popularity = self.get_popularity()
+        with self.metrics.stage('cold_start'):
+            if user_row < 0:
+                return popularity.top(k)
+            return popularity.for_tags(self.user_tag_matrix[user_row].indices, k)
+    
+    @timed_request('content')
+    @precomputed('content')
+    @cached_result('content')
+    def content_based_recommendations(self, user_id, n_recommendations=3):
+        """Generate content-based recommendations"""
+        user_row = self._user_rows([user_id])[0]
+        if user_row < 0:
+            # Cold start: unknown users get the global popularity ranking
+            post_rows, scores = self._cold_start_top_k(user_id, n_recommendations)
+            return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+        
+        scores = self._content_scores(user_row)
+        
+        # Ties keep posts_df order
+        with self.metrics.stage('top_k'):
+            top_rows, top_scores = top_k_positions(scores, n_recommendations)
+        return [self._post_record(row, int(score)) for row, score in zip(top_rows, top_scores)]
+    
+    def _content_scores(self, user_row):
+        """Score every post row for one user with sparse matrix ops"""
+        return self._content_matrix([user_row])[0]
+    
+    def _content_matrix(self, rows):
+        """Content scores of users_df ``rows`` against every post row"""
+        with self.metrics.stage('score.content'):
+            # Interest matching score: 2 points per shared tag
+            overlap = (self.user_tag_matrix[rows] @ self.post_tag_matrix.T).toarray().astype(np.int64)
+            
+            # Engagement history bias: +1 for new content, -1 if previously disliked
+            penalty = self.engagement_index.flags(self.user_row_codes[rows])[:, self.post_row_codes]
+            scores = 2 * overlap + 1 - penalty
+        self.metrics.count('candidates_scored', scores.size)
+        return scores
+    
+    @timed_request('tfidf')
+    @precomputed('tfidf')
+    @cached_result('tfidf')
+    def tfidf_recommendations(self, user_id, n_recommendations=3):
+        """Rank posts by cosine similarity between TF-IDF post and user profile vectors"""
+        top_k = dict(self._tfidf_top_k([user_id], n_recommendations))
+        post_rows, scores = top_k.get(0, ([], []))
+        return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+    
+    def _tfidf_profiles(self, user_rows):
+        """L2-normalized user vectors from interests, blended with liked posts"""
+        from sklearn.preprocessing import normalize
+        
+        profiles = normalize(self.user_interest_features[user_rows])
+        if self.tfidf_liked_weight:
+            positions = self.user_code_positions[self.user_row_codes[user_rows]]
+            has_history = sp.diags((positions >= 0).astype(np.float64))
+            liked = has_history @ self.liked_matrix[np.maximum(positions, 0)] @ self.content_features
+            profiles = normalize(profiles + self.tfidf_liked_weight * normalize(liked))
+        return profiles
+    
+    # Record fields read from posts_df and their defaults when a column is absent
+    POST_FIELDS = {'post_id': None, 'content_type': 'unknown', 'tags': '', 'creator_id': ''}
+    
+    def _tfidf_matrix(self, rows):
+        """TF-IDF cosine scores of users_df ``rows`` against every post row"""
+        with self.metrics.stage('score.tfidf'):
+            if len(self.tfidf_vocabulary) == 0:
+                # No tags to vectorize: every post scores 0, so only unseen posts in posts_df order remain
+                scores = np.zeros((len(rows), self.content_features.shape[0]))
+            else:
+                scores = (self._tfidf_profiles(rows) @ self.content_features.T).toarray()
+        self.metrics.count('candidates_scored', scores.size)
+        return scores
+    
+    def _post_record(self, row, score):
+        """Build a recommendation dict for a posts_df row position"""
+        if self._post_columns is None:
+            # Column arrays are indexed directly instead of materializing a row Series per record
+            self._post_columns = {
+                field: self.posts_df[field].array if field in self.posts_df.columns
+                else np.full(len(self.posts_df), default, dtype=object)
+                for field, default in self.POST_FIELDS.items()
+            }
+        columns = self._post_columns
+        return {
+            'post_id': columns['post_id'][row],
+            'score': score,
+            'content_type': columns['content_type'][row],
+            'tags': columns['tags'][row],
+            'creator_id': columns['creator_id'][row]
+        }
+    
+    def post_metadata(self, post_id):
+        """Return the metadata of a post in the catalog, or None"""
+        code = self.post_vocab.code(post_id)
+        row = self.post_code_first_row[code] if code >= 0 else -1
+        if row < 0:
+            return None
+        record = self._post_record(row, None)
+        del record['score']
+        return record
+    
+    def _engagement_flag(self, user_id, post_id):
+        user_code, post_code = self.user_vocab.code(user_id), self.post_vocab.code(post_id)
+        if user_code < 0 or post_code < 0:
+            return 0
+        return self.engagement_index.flag(user_code, post_code)
+    
+    def has_seen(self, user_id, post_id):
+        """Whether the user has engaged with the post"""
+        return self._engagement_flag(user_id, post_id) != 0
+    
+    def has_disliked(self, user_id, post_id):
+        """Whether the user's first engagement with the post was a dislike"""
+        return self._engagement_flag(user_id, post_id) == EngagementIndex.DISLIKED
+    
+    @timed_request('collaborative')
+    @precomputed('collaborative')
+    @cached_result('collaborative')
+    def collaborative_filtering_recommendations(self, user_id, n_recommendations=3):
+        """Generate collaborative filtering recommendations"""
+        # Users without engagement history fall back to popularity inside _collaborative_top_k
+        # Posts liked by the top collaborative_neighbors similar users but not seen by the target user,
+        # scored by the most similar neighbour who liked them
+        top_k = dict(self._collaborative_top_k([user_id], n_recommendations))
+        post_rows, scores = top_k.get(0, ([], []))
+        return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+    
+    @timed_request('item')
+    @precomputed('item')
+    @cached_result('item')
+    def item_based_recommendations(self, user_id, n_recommendations=3):
+        """Rank unseen posts by summed similarity to the posts the user liked"""
+        top_k = dict(self._item_top_k([user_id], n_recommendations))
+        post_rows, scores = top_k.get(0, ([], []))
+        return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+    
+    @timed_request('als')
+    @precomputed('als')
+    @cached_result('als')
+    def als_recommendations(self, user_id, n_recommendations=3):
+        """Rank unseen posts by the user's latent-factor preference scores"""
+        top_k = dict(self._als_top_k([user_id], n_recommendations))
+        post_rows, scores = top_k.get(0, ([], []))
+        return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+    
+    @timed_request('similar_posts')
+    def similar_posts(self, post_id, n_recommendations=3):
+        """Return the posts most similar to ``post_id`` by shared likers"""
+        code = self.post_vocab.code(post_id)
+        row = self.post_code_first_row[code] if code >= 0 else -1
+        if row < 0:
+            return []
+        post_rows, scores = self.get_item_similarity().similar(row, n_recommendations)
+        return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+    
+    @timed_request('hybrid')
+    @precomputed('hybrid')
+    @cached_result('hybrid')
+    def hybrid_recommendations(self, user_id, n_recommendations=3):
+        """Generate hybrid recommendations by fusing normalized component scores"""
+        top_k = dict(self._hybrid_top_k([user_id], n_recommendations))
+        post_rows, scores = top_k.get(0, ([], []))
+        return [self._post_record(row, float(score)) for row, score in zip(post_rows, scores)]
+    
+    def recommend_batch(self, user_ids, algorithm='hybrid', n_recommendations=3, chunk_size=1024, n_jobs=None):
+        """Generate recommendations for many users at once
+
+        Users are scored in chunks of ``chunk_size`` with matrix-matrix
+        products, so peak memory is bounded by ``chunk_size`` × posts per
+        worker thread. Returns a columnar DataFrame with one row per
+        (user_id, rank) in the order of ``user_ids``; users without history
+        get popularity rankings. Equal scores are ordered by post position. Users with a fresh entry in a
+        loaded top-N table are read from it instead of being scored.
+        """
+        if algorithm not in self.BATCH_ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        score_chunk = getattr(self, self.BATCH_ALGORITHMS[algorithm])
+        if algorithm in self.topn_tables:
+            score_chunk = functools.partial(self._table_batch, algorithm, score_chunk)
+        
+        user_ids = np.asarray(list(user_ids), dtype=object)
+        chunks = [user_ids[start:start + chunk_size] for start in range(0, len(user_ids), chunk_size)]
+        with self.metrics.request(f'{algorithm}_batch'), ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(lambda chunk: score_chunk(chunk, n_recommendations), chunks))
+        
+        frames = [
+            pd.DataFrame({
+                'user_id': chunk[user_index],
+                'rank': ranks,
+                'post_id': self.posts_df['post_id'].values[post_rows],
+                'score': scores
+            })
+            for chunk, (user_index, ranks, post_rows, scores) in zip(chunks, results)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=['user_id', 'rank', 'post_id', 'score'])
+        return pd.concat(frames, ignore_index=True)
+    
+    BATCH_ALGORITHMS = {
+        'content': '_content_batch',
+        'tfidf': '_tfidf_batch',
+        'collaborative': '_collaborative_batch',
+        'item': '_item_batch',
+        'als': '_als_batch',
+        'hybrid': '_hybrid_batch'
+    }
+    
+    @staticmethod
+    def _columnar(per_user):
+        """Flatten per-user (post_rows, scores) pairs into columnar arrays ordered by chunk index"""
+        user_index, ranks, post_rows, scores = [], [], [], []
+        # Cold-start users are yielded first, so restore the input order
+        for i, (rows, row_scores) in sorted(per_user, key=lambda item: item[0]):
+            user_index.append(np.full(len(rows), i))
+            ranks.append(np.arange(1, len(rows) + 1))
+            post_rows.append(rows)
+            scores.append(row_scores)
+        if not user_index:
+            return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                    np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        return tuple(np.concatenate(column) for column in (user_index, ranks, post_rows, scores))
+    
+    def _content_top_k(self, user_ids, k):
+        """Yield (chunk index, post rows, scores) of the top-k content scores"""
+        rows = self._user_rows(user_ids)
+        for i in np.flatnonzero(rows < 0):
+            yield i, self._cold_start_top_k(user_ids[i], k)
+        known = np.flatnonzero(rows >= 0)
+        scores = self._content_matrix(rows[known])
+        with self.metrics.stage('top_k'):
+            found = [top_k_positions(row_scores, k) for row_scores in scores]
+        yield from zip(known, found)
+    
+    def _tfidf_top_k(self, user_ids, k):
+        """Yield (chunk index, post rows, scores) of the top-k TF-IDF cosine scores"""
+        rows = self._user_rows(user_ids)
+        for i in np.flatnonzero(rows < 0):
+            yield i, self._cold_start_top_k(user_ids[i], k)
+        known = np.flatnonzero(rows >= 0)
+        rows = rows[known]
+        if len(rows) == 0:
+            return
+        scores = self._tfidf_matrix(rows)
+        
+        # Posts the user already engaged with are never recommended again
+        seen = self.engagement_index.flags(self.user_row_codes[rows])[:, self.post_row_codes] > 0
+        scores[seen] = -np.inf
+        with self.metrics.stage('top_k'):
+            found = [top_k_positions(row_scores, k) for row_scores in scores]
+        for i, (post_rows, found_scores) in zip(known, found):
+            unseen = np.isfinite(found_scores)
+            yield i, (post_rows[unseen], found_scores[unseen])
+    
+    def _collaborative_top_k(self, user_ids, k):
+        """Yield (chunk index, post rows, scores) of the top-k collaborative scores"""
+        positions = self._interaction_positions(user_ids)
+        for i in np.flatnonzero(positions < 0):
+            yield i, self._cold_start_top_k(user_ids[i], k)
+        known = np.flatnonzero(positions >= 0)
+        if len(known) == 0:
+            return
+        candidates = self._collaborative_candidates(positions[known])
+        if candidates is None:
+            return
+        
+        with self.metrics.stage('top_k'):
+            found = []
+            for row in range(candidates.shape[0]):
+                start, end = candidates.indptr[row], candidates.indptr[row + 1]
+                found_rows, found_scores = top_k_positions(candidates.data[start:end] - 1, k)
+                found.append((candidates.indices[start:end][found_rows], found_scores))
+        yield from zip(known, found)
+    
+    def _collaborative_candidates(self, positions):
+        """Unseen posts liked by each user's nearest neighbours, stored as similarity + 1"""
+        similarity = self.get_user_similarity()
+        with self.metrics.stage('neighbors'):
+            neighbors, neighbor_scores = similarity.neighbors.query_many(positions, self.collaborative_neighbors)
+        
+        # Each candidate keeps its best neighbour similarity; +1 keeps zero similarities stored
+        with self.metrics.stage('score.collaborative'):
+            candidates = None
+            for rank in range(neighbors.shape[1]):
+                valid = neighbors[:, rank] >= 0
+                weights = np.where(valid, neighbor_scores[:, rank] + 1, 0)
+                part = sp.diags(weights) @ self.liked_matrix[np.where(valid, neighbors[:, rank], 0)]
+                self.metrics.count('engagements_scanned', part.nnz)
+                candidates = part if candidates is None else candidates.maximum(part)
+            if candidates is None:
+                return None
+            candidates = sp.csr_matrix(candidates - candidates.multiply(self.seen_matrix[positions]))
+            candidates.eliminate_zeros()
+            # maximum() and the seen subtraction leave rows unsorted; top-k ties must follow post position
+            candidates.sort_indices()
+        self.metrics.count('candidates_scored', candidates.nnz)
+        return candidates
+    
+    def _collaborative_matrix(self, positions):
+        """Collaborative scores of interaction ``positions`` against every post row, 0 for non-candidates"""
+        candidates = self._collaborative_candidates(positions)
+        if candidates is None:
+            return np.zeros((len(positions), len(self.posts_df)))
+        scores = candidates.toarray()
+        np.subtract(scores, 1, out=scores, where=scores > 0)
+        return scores
+    
+    def _item_top_k(self, user_ids, k):
+        """Yield (chunk index, post rows, scores) of the top-k item-based scores"""
+        positions = self._interaction_positions(user_ids)
+        for i in np.flatnonzero(positions < 0):
+            yield i, self._cold_start_top_k(user_ids[i], k)
+        known = np.flatnonzero(positions >= 0)
+        if len(known) == 0:
+            return
+        candidates = self._item_candidates(positions[known])
+        with self.metrics.stage('top_k'):
+            found = []
+            for row in range(candidates.shape[0]):
+                start, end = candidates.indptr[row], candidates.indptr[row + 1]
+                found_rows, found_scores = top_k_positions(candidates.data[start:end], k)
+                found.append((candidates.indices[start:end][found_rows], found_scores))
+        yield from zip(known, found)
+    
+    def _item_candidates(self, positions):
+        """Item-based scores of unseen posts for interaction ``positions`` (sparse users × posts)"""
+        item_similarity = self.get_item_similarity()
+        with self.metrics.stage('score.item'):
+            liked = self.liked_matrix[positions]
+            scores = item_similarity.scores(liked)
+            candidates = sp.csr_matrix(scores - scores.multiply(self.seen_matrix[positions]))
+            candidates.eliminate_zeros()
+            candidates.sort_indices()
+        self.metrics.count('engagements_scanned', liked.nnz)
+        self.metrics.count('candidates_scored', candidates.nnz)
+        return candidates
+    
+    def _item_matrix(self, positions):
+        """Item-based scores of interaction ``positions`` against every post row"""
+        return self._item_candidates(positions).toarray()
+    
+    def _als_top_k(self, user_ids, k):
+        """Yield (chunk index, post rows, scores) of the top-k ALS scores"""
+        positions = self._interaction_positions(user_ids)
+        for i in np.flatnonzero(positions < 0):
+            yield i, self._cold_start_top_k(user_ids[i], k)
+        known = np.flatnonzero(positions >= 0)
+        if len(known) == 0:
+            return
+        scores = self._als_scores(positions[known])
+        scores[self.seen_matrix[positions[known]].toarray() > 0] = -np.inf
+        scores[:, self._duplicate_post_rows()] = -np.inf
+        with self.metrics.stage('top_k'):
+            post_rows, top_scores = top_k_rows(scores, k)
+        for i, found, found_scores in zip(known, post_rows, top_scores):
+            finite = np.isfinite(found_scores)
+            # Factors are float32; widen so batches match the float64 cold-start scores they are mixed with
+            yield i, (found[finite], found_scores[finite].astype(np.float64))
+    
+    def _als_matrix(self, positions):
+        """ALS scores of interaction ``positions`` against every post row, seen posts at the row minimum"""
+        scores = self._als_scores(positions)
+        seen = self.seen_matrix[positions].toarray() > 0
+        np.copyto(scores, scores.min(axis=1, keepdims=True), where=seen)
+        return scores
+    
+    def _als_scores(self, positions):
+        """Raw ALS preference scores of interaction ``positions`` against every post row"""
+        model = self.get_als_model()
+        with self.metrics.stage('score.als'):
+            scores = model.scores(positions)
+        self.metrics.count('candidates_scored', scores.size)
+        return scores
+    
+    def _duplicate_post_rows(self):
+        """Mask of posts_df rows repeating an earlier row's post_id"""
+        return self.post_code_first_row[self.post_row_codes] != np.arange(len(self.posts_df))
+    
+    def _content_batch(self, user_ids, n_recommendations):
+        return self._columnar(self._content_top_k(user_ids, n_recommendations))
+    
+    def _tfidf_batch(self, user_ids, n_recommendations):
+        return self._columnar(self._tfidf_top_k(user_ids, n_recommendations))
+    
+    def _collaborative_batch(self, user_ids, n_recommendations):
+        return self._columnar(self._collaborative_top_k(user_ids, n_recommendations))
+    
+    def _item_batch(self, user_ids, n_recommendations):
+        return self._columnar(self._item_top_k(user_ids, n_recommendations))
+    
+    def _als_batch(self, user_ids, n_recommendations):
+        return self._columnar(self._als_top_k(user_ids, n_recommendations))
+    
+    def _hybrid_batch(self, user_ids, n_recommendations):
+        return self._columnar(self._hybrid_top_k(user_ids, n_recommendations))
+    
+    DEFAULT_HYBRID_WEIGHTS = {'content': 0.6, 'collaborative': 0.4}
+    
+    # Hybrid components: (user id -> row lookup, dense scores of those rows over posts_df rows)
+    FUSION_COMPONENTS = {
+        'content': ('_user_rows', '_content_matrix'),
+        'tfidf': ('_user_rows', '_tfidf_matrix'),
+        'collaborative': ('_interaction_positions', '_collaborative_matrix'),
+        'item': ('_interaction_positions', '_item_matrix'),
+        'als': ('_interaction_positions', '_als_matrix')
+    }
+    
+    def _hybrid_top_k(self, user_ids, k):
+        """Yield (chunk index, post rows, scores) of the top-k fused component scores"""
+        lookups = {
+            name: getattr(self, self.FUSION_COMPONENTS[name][0])(user_ids)
+            for name, weight in self.hybrid_weights.items() if weight
+        }
+        known = np.zeros(len(user_ids), dtype=bool)
+        for rows in lookups.values():
+            known |= rows >= 0
+        for i in np.flatnonzero(~known):
+            yield i, self._cold_start_top_k(user_ids[i], k)
+        known = np.flatnonzero(known)
+        if len(known) == 0:
+            return
+        
+        # Every component scores the same posts_df columns, so fusion is elementwise
+        blocks = {}
+        for name, rows in lookups.items():
+            rows = rows[known]
+            available = rows >= 0
+            score_rows = getattr(self, self.FUSION_COMPONENTS[name][1])
+            if available.all():
+                scores = score_rows(rows)
+            else:
+                scores = np.zeros((len(known), len(self.posts_df)))
+                if available.any():
+                    scores[available] = score_rows(rows[available])
+            blocks[name] = (available, scores)
+        with self.metrics.stage('fuse'):
+            fused = fuse(blocks, self.hybrid_weights, self.hybrid_normalization)
+        
+        # Seen and disliked posts are masked after fusion, so a user whose components are all
+        # constant (e.g. only a dislike and no profile) cannot get them back with a tied score
+        seen = self.engagement_index.flags(self.user_vocab.encode(user_ids)[known])[:, self.post_row_codes] > 0
+        fused[seen] = -np.inf
+        
+        # Posts rows repeating a post_id are represented by their first row
+        fused[:, self._duplicate_post_rows()] = -np.inf
+        with self.metrics.stage('top_k'):
+            post_rows, scores = top_k_rows(fused, k)
+        for i, found, found_scores in zip(known, post_rows, scores):
+            finite = np.isfinite(found_scores)
+            yield i, (found[finite], found_scores[finite])
@@ -0,0 +1,212 @@
+"""Offline evaluation: per-user engagement splits and top-k ranking metrics"""
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SPLITS = ('random', 'leave_last_out', 'time')
+DEFAULT_ALGORITHMS = ('content', 'tfidf', 'collaborative', 'item', 'als', 'hybrid')
+
+def split_engagements(engagements_df, strategy='random', test_fraction=0.2, seed=0):
+    """Split engagements into (train, test) frames
+
+    ``random`` holds out ``test_fraction`` of each user's engagements,
+    ``leave_last_out`` each user's last one (by ``timestamp`` when present,
+    else file order). Both keep at least one engagement per user in train.
+    ``time`` holds out everything after the ``1 - test_fraction`` quantile
+    of ``timestamp``, so users first seen later are evaluated cold.
+    """
+    if strategy not in SPLITS:
+        raise ValueError(f"Unknown split: {strategy}")
+    engagements_df = engagements_df.reset_index(drop=True)
+    if strategy == 'time':
+        if 'timestamp' not in engagements_df.columns:
+            raise ValueError("A time split needs a timestamp column")
+        from .engine import _timestamp_seconds
+        
+        seconds = _timestamp_seconds(engagements_df['timestamp'])
+        test = seconds > np.nanquantile(seconds, 1 - test_fraction)
+        return engagements_df[~test].reset_index(drop=True), engagements_df[test].reset_index(drop=True)
+    
+    if strategy == 'random':
+        order = np.random.default_rng(seed).random(len(engagements_df))
+    elif 'timestamp' in engagements_df.columns:
+        from .engine import _timestamp_seconds
+        
+        order = np.nan_to_num(_timestamp_seconds(engagements_df['timestamp']), nan=-np.inf)
+    else:
+        order = np.arange(len(engagements_df), dtype=np.float64)
+    
+    # Rank each user's engagements from the end of their order; the last n_test are held out
+    users = pd.factorize(engagements_df['user_id'])[0]
+    keys = pd.DataFrame({'user': users, 'order': order}).sort_values(['user', 'order'], kind='stable')
+    groups = keys.groupby('user', sort=False)['order']
+    from_end = groups.cumcount(ascending=False).values
+    sizes = groups.transform('size').values
+    if strategy == 'random':
+        n_test = np.minimum(np.maximum(np.round(sizes * test_fraction), sizes >= 2), sizes - 1)
+    else:
+        n_test = (sizes >= 2).astype(np.int64)
+    test = np.zeros(len(engagements_df), dtype=bool)
+    test[keys.index.values] = from_end < n_test
+    return engagements_df[~test].reset_index(drop=True), engagements_df[test].reset_index(drop=True)
+
+def relevant_pairs(train_df, test_df):
+    """Distinct liked (user_id, post_id) test pairs the user had not engaged with in train"""
+    liked = test_df.loc[test_df['engagement'] == 1, ['user_id', 'post_id']]
+    liked = pd.DataFrame({column: np.asarray(liked[column], dtype=object) for column in liked}).drop_duplicates()
+    seen = pd.MultiIndex.from_arrays(
+        [np.asarray(train_df['user_id'], dtype=object), np.asarray(train_df['post_id'], dtype=object)]
+    )
+    return liked[~pd.MultiIndex.from_frame(liked).isin(seen)].reset_index(drop=True)
+
+def ranking_metrics(recommendations, relevant, k, popularity):
+    """Precision, recall, NDCG and MAP at ``k``, catalog coverage and novelty
+
+    ``recommendations`` has user_id, rank (from 1) and post_id columns;
+    ``relevant`` has the held-out user_id/post_id pairs, and every user in
+    it counts, including users who got no recommendations. Novelty is the
+    mean self-information ``-log2(p)`` of recommended posts and coverage
+    the share of catalog posts recommended at least once; ``popularity``
+    comes from ``post_popularity``.
+    """
+    n_relevant = relevant.groupby('user_id', sort=False).size()
+    if n_relevant.empty:
+        raise ValueError("No held-out likes to evaluate against")
+    recommendations = pd.DataFrame({
+        'user_id': np.asarray(recommendations['user_id'], dtype=object),
+        'rank': np.asarray(recommendations['rank'], dtype=np.int64),
+        'post_id': np.asarray(recommendations['post_id'], dtype=object)
+    })
+    recommendations = recommendations[recommendations['rank'] <= k]
+    
+    # Hits in rank order; the i-th hit of a user at rank r adds i / r to their average precision
+    hits = recommendations.merge(relevant, on=['user_id', 'post_id']).sort_values(['user_id', 'rank'])
+    hit_number = hits.groupby('user_id', sort=False).cumcount().values + 1
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    per_user = pd.DataFrame({
+        'user_id': hits['user_id'].values,
+        'hits': 1,
+        'dcg': discounts[hits['rank'].values - 1],
+        'precision_sum': hit_number / hits['rank'].values
+    }).groupby('user_id').sum().reindex(n_relevant.index, fill_value=0)
+    
+    capped = np.minimum(n_relevant.values, k)
+    ideal = np.cumsum(discounts)[capped - 1]
+    shares = popularity.reindex(recommendations['post_id'].values).values
+    return {
+        'users': len(n_relevant),
+        'precision': float((per_user['hits'].values / k).mean()),
+        'recall': float((per_user['hits'].values / n_relevant.values).mean()),
+        'ndcg': float((per_user['dcg'].values / ideal).mean()),
+        'map': float((per_user['precision_sum'].values / capped).mean()),
+        'coverage': recommendations['post_id'].nunique() / max(len(popularity), 1),
+        'novelty': float(-np.log2(shares).mean()) if len(shares) else 0.0
+    }
+
+def post_popularity(train_df, post_ids):
+    """Share of train users who engaged with each catalog post, at least 1 / users"""
+    pairs = pd.DataFrame({
+        'user_id': np.asarray(train_df['user_id'], dtype=object),
+        'post_id': np.asarray(train_df['post_id'], dtype=object)
+    }).drop_duplicates()
+    n_users = max(pairs['user_id'].nunique(), 1)
+    counts = pairs.groupby('post_id').size().reindex(pd.unique(np.asarray(post_ids, dtype=object)), fill_value=0)
+    return np.maximum(counts, 1) / n_users
+
+# Fitted engine of a worker process, memory-mapped from a temporary artifact
+_WORKER_ENGINE = None
+
+def _init_worker(artifact_dir):
+    global _WORKER_ENGINE
+    from .engine import ContentRecommendationSystem
+    
+    _WORKER_ENGINE = ContentRecommendationSystem.load(artifact_dir)
+
+def _score_chunk(task):
+    algorithm, user_ids, k = task
+    return _WORKER_ENGINE.recommend_batch(user_ids, algorithm, k, n_jobs=1)
+
+def score_users(engine, user_ids, algorithms, k, n_jobs=1):
+    """Yield (algorithm, recommendations, seconds) for ``user_ids`` via ``recommend_batch``
+
+    With ``n_jobs`` > 1 the fitted engine is saved once as an artifact and
+    each worker process memory-maps it, so the fitted arrays are shared
+    through the page cache.
+    """
+    user_ids = np.asarray(user_ids, dtype=object)
+    if n_jobs == 1:
+        for algorithm in algorithms:
+            start = time.perf_counter()
+            recommendations = engine.recommend_batch(user_ids, algorithm, k)
+            yield algorithm, recommendations, time.perf_counter() - start
+        return
+    
+    # Build the lazy models these algorithms use once here rather than in every worker
+    warm_user = engine.user_item_matrix.user_ids[:1]
+    for algorithm in algorithms:
+        engine.recommend_batch(warm_user, algorithm, k)
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        engine.save(artifact_dir, build=False)
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(artifact_dir,)) as pool:
+            chunks = np.array_split(user_ids, max(n_jobs, 1) * 4)
+            for algorithm in algorithms:
+                start = time.perf_counter()
+                parts = list(pool.map(_score_chunk, [(algorithm, chunk, k) for chunk in chunks if len(chunk)]))
+                recommendations = pd.concat(parts, ignore_index=True)
+                yield algorithm, recommendations, time.perf_counter() - start
+
+def prepare_split(users_df, posts_df, engagements_df, strategy='random', test_fraction=0.2, seed=0,
+                  engine_params=None):
+    """Split engagements and fit an engine on the train part
+
+    Returns ``(engine, relevant, popularity, summary)``: the fitted engine,
+    the held-out ``relevant_pairs``, catalog ``post_popularity`` and a dict
+    of split sizes and fit seconds.
+    """
+    from .engine import ContentRecommendationSystem
+    
+    train_df, test_df = split_engagements(engagements_df, strategy, test_fraction, seed)
+    relevant = relevant_pairs(train_df, test_df)
+    
+    engine = ContentRecommendationSystem(**(engine_params or {}))
+    start = time.perf_counter()
+    engine.load_frames(users_df, posts_df, train_df)
+    summary = {
+        'train_engagements': len(train_df),
+        'test_engagements': len(test_df),
+        'relevant_pairs': len(relevant),
+        'users': relevant['user_id'].nunique(),
+        'fit_seconds': time.perf_counter() - start
+    }
+    return engine, relevant, post_popularity(train_df, posts_df['post_id']), summary
+
+def evaluate(users_df, posts_df, engagements_df, algorithms=DEFAULT_ALGORITHMS, k=10, strategy='random',
+             test_fraction=0.2, seed=0, n_jobs=1, engine_params=None):
+    """Split, fit on the train part and report quality and throughput per algorithm
+
+    Frames should come from ``read_table``. Every user with a held-out like
+    is scored with ``recommend_batch`` (in ``n_jobs`` processes) and the
+    report holds ``ranking_metrics`` plus scoring seconds and users/sec.
+    """
+    engine, relevant, popularity, summary = prepare_split(
+        users_df, posts_df, engagements_df, strategy, test_fraction, seed, engine_params
+    )
+    user_ids = relevant['user_id'].unique()
+    report = {
+        'config': {
+            'algorithms': list(algorithms), 'k': k, 'split': strategy, 'test_fraction': test_fraction,
+            'seed': seed, 'n_jobs': n_jobs, 'engine_params': engine_params or {}
+        },
+        'split': {name: value for name, value in summary.items() if name != 'fit_seconds'},
+        'fit_seconds': summary['fit_seconds'],
+        'algorithms': {}
+    }
+    for algorithm, recommendations, seconds in score_users(engine, user_ids, algorithms, k, n_jobs):
+        metrics = ranking_metrics(recommendations, relevant, k, popularity)
+        metrics['seconds'] = seconds
+        metrics['users_per_sec'] = len(user_ids) / max(seconds, 1e-9)
+        report['algorithms'][algorithm] = metrics
+    return report
@@ -0,0 +1,62 @@
+"""Weighted fusion of aligned (users × posts) score blocks"""
+import numpy as np
+
+# A normalizer returns (values, offset, scale) per row; the normalized block
+# is (values - offset) * scale, which fuse() folds into one pass with the weight
+
+def _inverse(spread):
+    """1 / spread, with 0 for constant rows so they contribute nothing"""
+    return np.divide(1.0, spread, out=np.zeros_like(spread, dtype=np.float64), where=spread > 0)
+
+def _minmax(scores):
+    """Map each row onto [0, 1]"""
+    low = scores.min(axis=1)
+    return scores, low, _inverse(scores.max(axis=1) - low)
+
+def _zscore(scores):
+    """Center each row and scale it to unit variance"""
+    return scores, scores.mean(axis=1), _inverse(scores.std(axis=1))
+
+def _rank(scores):
+    """Average rank of each score within its row, mapped onto [0, 1]"""
+    from scipy.stats import rankdata
+    
+    ranks = rankdata(scores, method='average', axis=1)
+    return ranks, np.ones(len(scores)), np.full(len(scores), 1 / max(scores.shape[1] - 1, 1))
+
+def _identity(scores):
+    return scores, np.zeros(len(scores)), np.ones(len(scores))
+
+NORMALIZERS = {
+    'minmax': _minmax,
+    'zscore': _zscore,
+    'rank': _rank,
+    'none': _identity
+}
+
+def check_fusion(weights, normalization, components):
+    """Raise ValueError for an unknown normalization or component, or all-zero weights"""
+    if normalization not in NORMALIZERS:
+        raise ValueError(f"Unknown normalization: {normalization}")
+    unknown = [name for name in weights if name not in components]
+    if unknown:
+        raise ValueError(f"Unknown hybrid component(s): {', '.join(unknown)}")
+    if not any(weights.values()):
+        raise ValueError("At least one hybrid weight must be non-zero")
+
+def fuse(blocks, weights, normalization='minmax'):
+    """Weighted sum of row-normalized score blocks
+
+    ``blocks`` maps a component name to ``(available, scores)``: a boolean
+    mask of the users the component can score and their float scores, one
+    row per user and one column per post. Rows of unavailable users add
+    nothing, so a user is ranked by whichever components know them.
+    """
+    normalize = NORMALIZERS[normalization]
+    fused = None
+    for name, (available, scores) in blocks.items():
+        values, offset, scale = normalize(scores)
+        term = np.subtract(values, offset[:, None], dtype=np.float64)
+        term *= (scale * weights[name] * available)[:, None]
+        fused = term if fused is None else np.add(fused, term, out=fused)
+    return fused
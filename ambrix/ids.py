@@ -0,0 +1,77 @@
+"""Dictionary encoding of string ids to dense int32 codes"""
+import numpy as np
+import pandas as pd
+
+def _distinct(values):
+    """Distinct non-null values in first-seen order, hashing categoricals once per category"""
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = pd.unique(values.cat.codes.values)
+        return pd.Index(values.cat.categories.take(codes[codes >= 0]))
+    return pd.Index(pd.unique(values.values)).dropna()
+
+class IdVocabulary:
+    """Interns ids to dense int32 codes in first-seen order
+
+    A code is the id's position in ``ids`` and never changes once assigned,
+    so arrays indexed by code only ever grow. Unknown or missing ids encode
+    to ``-1``. Engine structures are indexed by these codes; strings are
+    decoded only at the API boundary.
+    """
+    
+    def __init__(self, values=()):
+        self.ids = _distinct(values)
+    
+    def state(self):
+        return {'ids': self.ids}
+    
+    @classmethod
+    def from_state(cls, state):
+        vocabulary = cls.__new__(cls)
+        vocabulary.ids = state['ids']
+        return vocabulary
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __contains__(self, value):
+        return value in self.ids
+    
+    def encode(self, values):
+        """Return the int32 codes of ``values``, -1 for ids not in the vocabulary"""
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            # Look each category up once, then index by the categorical codes
+            category_codes = np.append(self.ids.get_indexer(values.cat.categories), -1).astype(np.int32)
+            return category_codes[values.cat.codes.values]
+        return self.ids.get_indexer(values).astype(np.int32)
+    
+    def code(self, value):
+        """Return the code of a single id, or -1"""
+        try:
+            return int(self.ids.get_loc(value))
+        except (KeyError, TypeError):
+            return -1
+    
+    def extend(self, values):
+        """Assign codes to unseen ids and return the codes of ``values``"""
+        new = _distinct(values).difference(self.ids, sort=False)
+        if len(new):
+            self.ids = self.ids.append(new)
+        return self.encode(values)
+    
+    def decode(self, codes):
+        """Return the ids for an array of codes"""
+        return np.asarray(self.ids)[np.asarray(codes)]
+
+def code_lookup(codes, size):
+    """Array of length ``size`` mapping each code to its first position in ``codes``, -1 elsewhere"""
+    lookup = np.full(size, -1, dtype=np.int32)
+    distinct, first = np.unique(codes[codes >= 0], return_index=True)
+    lookup[distinct] = np.flatnonzero(codes >= 0)[first]
+    return lookup
+
+def grown(lookup, size):
+    """Return ``lookup`` padded with -1 up to ``size`` codes"""
+    if len(lookup) >= size:
+        return lookup
+    return np.concatenate([lookup, np.full(size - len(lookup), -1, dtype=lookup.dtype)])
@@ -0,0 +1,250 @@
+"""Sparse user×post interaction storage"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+def split_tokens(df, column, sep=', '):
+    """Split a delimited string column into a Series of tokens indexed by row position
+
+    Categorical columns are split once per distinct value and expanded to
+    rows by code, so repeated tag combinations are not re-parsed.
+    """
+    if column not in df.columns:
+        return pd.Series([], dtype=object)
+    values = df[column]
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        tokens = pd.Series(values.values).str.split(sep).explode()
+        return tokens[tokens.notna()]
+    
+    categories = pd.Series(values.cat.categories.astype(object)).str.split(sep).explode()
+    categories = categories[categories.notna()]
+    per_code = np.bincount(categories.index.values, minlength=len(values.cat.categories))
+    starts = np.concatenate(([0], np.cumsum(per_code)))
+    
+    # Each row repeats the token run of its category, rows with missing values have none
+    codes = values.cat.codes.values
+    rows = np.flatnonzero(codes >= 0)
+    counts = per_code[codes[rows]]
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.repeat(starts[codes[rows]], counts) + offsets
+    return pd.Series(categories.values[positions], index=np.repeat(rows, counts))
+
+def binary_matrix(rows, cols, shape):
+    """Build a CSR 0/1 matrix, collapsing repeated (row, col) pairs"""
+    matrix = sp.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=shape)
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+def add_binary_pairs(matrix, rows, cols):
+    """Return a 0/1 ``matrix`` with the (rows, cols) pairs set, skipping ones already set"""
+    if len(rows) == 0:
+        return matrix
+    pairs = binary_matrix(rows, cols, matrix.shape).tocoo()
+    new = np.asarray(matrix[pairs.row, pairs.col]).ravel() == 0
+    return matrix + sp.csr_matrix(
+        (np.ones(new.sum(), dtype=matrix.dtype), (pairs.row[new], pairs.col[new])),
+        shape=matrix.shape
+    )
+
+def resized(matrix, shape):
+    """Return a CSR copy of ``matrix`` grown to ``shape``, sharing data and indices"""
+    matrix = matrix.tocsr()
+    extra_rows = shape[0] - matrix.shape[0]
+    indptr = matrix.indptr
+    if extra_rows:
+        indptr = np.concatenate([indptr, np.full(extra_rows, indptr[-1], dtype=indptr.dtype)])
+    return sp.csr_matrix((matrix.data, matrix.indices, indptr), shape=shape, copy=False)
+
+def replace_entries(matrix, rows, cols, values):
+    """Return ``matrix`` with the (rows, cols) entries overwritten by ``values``
+
+    Existing entries are cancelled exactly before the new values are added,
+    so repeated updates do not accumulate rounding error.
+    """
+    old = np.asarray(matrix[rows, cols]).ravel()
+    shape = matrix.shape
+    updated = (
+        matrix
+        - sp.csr_matrix((old, (rows, cols)), shape=shape)
+        + sp.csr_matrix((np.asarray(values, dtype=matrix.dtype), (rows, cols)), shape=shape)
+    )
+    updated.eliminate_zeros()
+    return updated
+
+class InteractionMatrix:
+    """Sparse user×post engagement matrix with stable id ↔ position maps
+
+    Replaces the dense ``pivot_table``: duplicate (user, post) engagements are
+    averaged, users and posts are ordered by sorted id, and absent pairs are
+    implicit zeros. ``counts`` keeps the number of engagements behind each
+    mean so ``update`` can fold in new events; users and posts first seen in
+    an update are appended, so existing positions never move.
+    """
+    
+    @classmethod
+    def from_codes(cls, user_codes, post_codes, engagement, user_vocab, post_vocab):
+        """Build from interned int32 id codes, aggregating pairs with bincount instead of groupby"""
+        n_posts = len(post_vocab)
+        pairs, inverse = np.unique(user_codes.astype(np.int64) * n_posts + post_codes, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(pairs))
+        sums = np.bincount(inverse, weights=engagement, minlength=len(pairs))
+        pair_users, pair_posts = np.divmod(pairs, n_posts)
+        
+        # Users and posts are ordered by sorted id
+        matrix = cls.__new__(cls)
+        user_present, pair_users = np.unique(pair_users, return_inverse=True)
+        post_present, pair_posts = np.unique(pair_posts, return_inverse=True)
+        user_ids = pd.Index(user_vocab.decode(user_present))
+        post_ids = pd.Index(post_vocab.decode(post_present))
+        user_order, post_order = user_ids.argsort(), post_ids.argsort()
+        matrix.user_ids, matrix.post_ids = user_ids[user_order], post_ids[post_order]
+        rows = np.argsort(user_order)[pair_users]
+        cols = np.argsort(post_order)[pair_posts]
+        shape = (len(matrix.user_ids), len(matrix.post_ids))
+        matrix.csr = sp.csr_matrix((sums / counts, (rows, cols)), shape=shape)
+        matrix.csr.eliminate_zeros()
+        matrix.counts = sp.csr_matrix((counts.astype(np.int32), (rows, cols)), shape=shape)
+        matrix._build_positions()
+        return matrix
+    
+    def update(self, engagements_df):
+        """Fold a batch of engagements into the running means in place
+
+        Returns the positions of the users whose rows changed.
+        """
+        # Ingested ids are categorical; observed=True keeps pandas 2 from grouping every user×post combination
+        grouped = engagements_df.groupby(['user_id', 'post_id'], observed=True)['engagement'].agg(['sum', 'count'])
+        if grouped.empty:
+            return np.empty(0, dtype=np.int64)
+        user_ids = grouped.index.get_level_values('user_id')
+        post_ids = grouped.index.get_level_values('post_id')
+        
+        new_users = user_ids.unique().difference(self.user_ids, sort=False)
+        new_posts = post_ids.unique().difference(self.post_ids, sort=False)
+        if len(new_users) or len(new_posts):
+            self.user_ids = self.user_ids.append(new_users)
+            self.post_ids = self.post_ids.append(new_posts)
+            shape = (len(self.user_ids), len(self.post_ids))
+            self.csr = resized(self.csr, shape)
+            self.counts = resized(self.counts, shape)
+            self._build_positions()
+        
+        rows = self.user_ids.get_indexer(user_ids)
+        cols = self.post_ids.get_indexer(post_ids)
+        old_means = np.asarray(self.csr[rows, cols]).ravel()
+        old_counts = np.asarray(self.counts[rows, cols]).ravel()
+        new_counts = old_counts + grouped['count'].values
+        new_means = (old_means * old_counts + grouped['sum'].values) / new_counts
+        self.csr = replace_entries(self.csr, rows, cols, new_means)
+        self.counts = replace_entries(self.counts, rows, cols, new_counts)
+        return np.unique(rows)
+    
+    def _build_positions(self):
+        self._user_positions = pd.Series(np.arange(len(self.user_ids)), index=self.user_ids)
+    
+    def state(self):
+        """Return the arrays needed to rebuild this matrix with ``from_state``"""
+        return {'csr': self.csr, 'counts': self.counts, 'user_ids': self.user_ids, 'post_ids': self.post_ids}
+    
+    @classmethod
+    def from_state(cls, state):
+        matrix = cls.__new__(cls)
+        matrix.csr = state['csr']
+        matrix.counts = state['counts']
+        matrix.user_ids = state['user_ids']
+        matrix.post_ids = state['post_ids']
+        matrix._build_positions()
+        return matrix
+    
+    @property
+    def shape(self):
+        return self.csr.shape
+    
+    def __contains__(self, user_id):
+        return user_id in self._user_positions.index
+    
+    def user_position(self, user_id):
+        return self._user_positions[user_id]
+    
+    def to_frame(self):
+        """Return the dense users×posts DataFrame the old pivot produced"""
+        return pd.DataFrame(self.csr.toarray(), index=self.user_ids, columns=self.post_ids)
+    
+    def memory_report(self):
+        """Compare the sparse storage footprint with the equivalent dense pivot"""
+        n_users, n_posts = self.shape
+        sparse_bytes = self.csr.data.nbytes + self.csr.indices.nbytes + self.csr.indptr.nbytes
+        dense_bytes = n_users * n_posts * np.dtype(np.float64).itemsize
+        return {
+            'n_users': n_users,
+            'n_posts': n_posts,
+            'nnz': int(self.csr.nnz),
+            'density': self.csr.nnz / max(n_users * n_posts, 1),
+            'sparse_bytes': int(sparse_bytes),
+            'dense_bytes': int(dense_bytes),
+            'compression_ratio': dense_bytes / max(sparse_bytes, 1)
+        }
+
+def first_pairs(user_codes, post_codes):
+    """Positions of the first engagement of each (user, post) code pair, in input order"""
+    keys = user_codes.astype(np.int64) << 32 | post_codes.astype(np.int64)
+    return np.sort(np.unique(keys, return_index=True)[1])
+
+class EngagementIndex:
+    """Per-user first-engagement flags stored CSR-style
+
+    Row ``user_code`` lists the post codes the user engaged with in
+    ``indices[indptr[user_code]:indptr[user_code + 1]]``, sorted, with one
+    flag per post in ``data``: ``SEEN``, or ``DISLIKED`` when the first
+    engagement was 0. Only the first engagement of a pair counts, so later
+    events never change a flag.
+    """
+    
+    SEEN = 1
+    DISLIKED = 2
+    
+    def __init__(self, user_codes, post_codes, engagement, shape):
+        first = first_pairs(user_codes, post_codes)
+        self.csr = sp.csr_matrix(
+            (self._flags(engagement[first]), (user_codes[first], post_codes[first])), shape=shape
+        )
+        self.csr.sort_indices()
+    
+    @classmethod
+    def _flags(cls, engagement):
+        return np.where(engagement == 0, cls.DISLIKED, cls.SEEN).astype(np.int8)
+    
+    def state(self):
+        return {'csr': self.csr}
+    
+    @classmethod
+    def from_state(cls, state):
+        index = cls.__new__(cls)
+        index.csr = state['csr']
+        return index
+    
+    @property
+    def shape(self):
+        return self.csr.shape
+    
+    def update(self, user_codes, post_codes, engagement, shape):
+        """Grow to ``shape`` and flag the pairs not engaged with before"""
+        first = first_pairs(user_codes, post_codes)
+        rows, cols = user_codes[first], post_codes[first]
+        matrix = resized(self.csr, shape)
+        new = np.asarray(matrix[rows, cols]).ravel() == 0
+        self.csr = matrix + sp.csr_matrix(
+            (self._flags(engagement[first][new]), (rows[new], cols[new])), shape=shape
+        )
+        self.csr.sort_indices()
+    
+    def flag(self, user_code, post_code):
+        """Flag of one pair, 0 when the user never engaged with the post; O(log degree)"""
+        start, end = self.csr.indptr[user_code], self.csr.indptr[user_code + 1]
+        i = start + np.searchsorted(self.csr.indices[start:end], post_code)
+        return int(self.csr.data[i]) if i < end and self.csr.indices[i] == post_code else 0
+    
+    def flags(self, user_codes):
+        """Dense (len(user_codes), posts) flag array for a block of users"""
+        return self.csr[user_codes].toarray()
@@ -0,0 +1,197 @@
+"""Schema-checked, compact-dtype loading of the Users/Posts/Engagements tables"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Required columns must be present; dtyped columns are coerced when present
+SCHEMAS = {
+    'users': {
+        'required': ('user_id',),
+        'dtypes': {'user_id': 'category', 'top_3_interests': 'category', 'gender': 'category'}
+    },
+    'posts': {
+        'required': ('post_id',),
+        'dtypes': {'post_id': 'category', 'creator_id': 'category', 'content_type': 'category', 'tags': 'category'}
+    },
+    'engagements': {
+        'required': ('user_id', 'post_id', 'engagement'),
+        'dtypes': {'user_id': 'category', 'post_id': 'category', 'engagement': 'int8'}
+    }
+}
+
+FORMATS = ('csv', 'parquet', 'arrow')
+
+class SchemaError(ValueError):
+    """Raised when an input table is missing columns or holds invalid values"""
+
+def detect_format(source):
+    """Guess the file format from a path or an upload's ``name``; CSV by default"""
+    name = getattr(source, 'name', source)
+    if isinstance(name, (str, os.PathLike)):
+        name = os.fspath(name).lower()
+        if name.endswith(('.parquet', '.pq')):
+            return 'parquet'
+        if name.endswith(('.arrow', '.feather', '.ipc')):
+            return 'arrow'
+    return 'csv'
+
+def _require_pyarrow(fmt):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"Reading {fmt} files requires pyarrow (pip install 'ambrix[parquet]')") from e
+
+def _check_columns(columns, table):
+    missing = [column for column in SCHEMAS[table]['required'] if column not in columns]
+    if missing:
+        raise SchemaError(f"{table.capitalize()} table is missing required column(s): {', '.join(missing)}")
+
+def _csv_chunks(source, table, chunksize):
+    dtypes = {column: 'category' for column, dtype in SCHEMAS[table]['dtypes'].items() if dtype == 'category'}
+    # Check the header alone first so a missing column fails before any rows are parsed
+    seekable = hasattr(source, 'seek') and hasattr(source, 'tell')
+    if seekable or isinstance(source, (str, os.PathLike)):
+        position = source.tell() if seekable else None
+        _check_columns(pd.read_csv(source, nrows=0).columns, table)
+        if seekable:
+            source.seek(position)
+    with pd.read_csv(source, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            _check_columns(chunk.columns, table)
+            yield chunk
+
+def _parquet_chunks(source, table, chunksize):
+    _require_pyarrow('parquet')
+    import pyarrow.parquet as pq
+    
+    parquet_file = pq.ParquetFile(source)
+    _check_columns(parquet_file.schema_arrow.names, table)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+def _arrow_chunks(source, table, chunksize):
+    _require_pyarrow('arrow')
+    import pyarrow as pa
+    
+    reader = pa.ipc.open_file(source)
+    _check_columns(reader.schema.names, table)
+    for i in range(reader.num_record_batches):
+        yield reader.get_batch(i).to_pandas()
+
+READERS = {
+    'csv': _csv_chunks,
+    'parquet': _parquet_chunks,
+    'arrow': _arrow_chunks
+}
+
+def _coerce(chunk, table, offset):
+    """Cast one chunk to the schema dtypes, raising on missing ids or bad engagement values"""
+    for column, dtype in SCHEMAS[table]['dtypes'].items():
+        if column not in chunk.columns:
+            continue
+        values = chunk[column]
+        if column in SCHEMAS[table]['required'] and values.isna().any():
+            row = offset + int(np.flatnonzero(values.isna().values)[0])
+            raise SchemaError(f"{table.capitalize()} table has a missing {column} at row {row}")
+        if dtype == 'category':
+            chunk[column] = values.astype('category')
+            continue
+        numeric = pd.to_numeric(values, errors='coerce')
+        info = np.iinfo(dtype)
+        invalid = numeric.isna() | (numeric % 1 != 0) | (numeric < info.min) | (numeric > info.max)
+        if invalid.any():
+            row = offset + int(np.flatnonzero(invalid.values)[0])
+            raise SchemaError(
+                f"{table.capitalize()} table has an invalid {column} value '{values.iloc[row - offset]}' "
+                f"at row {row}; expected integers such as 0/1"
+            )
+        chunk[column] = numeric.astype(dtype)
+    return chunk
+
+def _concat(chunks):
+    """Concatenate chunks, unioning categories instead of falling back to object"""
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    columns = {}
+    for column in chunks[0].columns:
+        parts = [chunk[column] for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[column] = union_categoricals(parts)
+        else:
+            columns[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+def coerce_frame(frame, table):
+    """Check an in-memory table against ``SCHEMAS[table]`` and cast it as ``read_table`` would
+
+    Raises ``SchemaError`` on a missing column, id or invalid value.
+    """
+    if table not in SCHEMAS:
+        raise ValueError(f"Unknown table: {table}")
+    _check_columns(frame.columns, table)
+    return _coerce(frame.reset_index(drop=True), table, 0)
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def read_table(source, table, fmt=None, chunksize=DEFAULT_CHUNKSIZE, trace_memory=False):
+    """Read a CSV, Parquet or Arrow IPC table in chunks with compact dtypes
+
+    ``table`` is one of ``SCHEMAS``. Ids and low-cardinality strings become
+    categoricals and ``engagement`` becomes int8. Required columns are
+    checked against the header before any rows are parsed. Returns the frame
+    and a report with row throughput, the process peak RSS and the size of
+    the resulting frame. ``trace_memory`` adds the exact peak allocated while
+    reading via tracemalloc, which slows parsing several times over.
+    """
+    if table not in SCHEMAS:
+        raise ValueError(f"Unknown table: {table}")
+    fmt = fmt or detect_format(source)
+    if fmt not in READERS:
+        raise ValueError(f"Unknown format: {fmt}")
+    
+    tracing = tracemalloc.is_tracing()
+    if trace_memory:
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        chunks, rows = [], 0
+        for chunk in READERS[fmt](source, table, chunksize):
+            chunks.append(_coerce(chunk, table, rows))
+            rows += len(chunk)
+        if not chunks:
+            raise SchemaError(f"{table.capitalize()} table is empty")
+        frame = _concat(chunks)
+        del chunks
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory and not tracing:
+            tracemalloc.stop()
+    seconds = time.perf_counter() - start
+    
+    report = {
+        'format': fmt,
+        'rows': len(frame),
+        'seconds': seconds,
+        'rows_per_sec': len(frame) / max(seconds, 1e-9),
+        'peak_rss_bytes': peak_rss_bytes(),
+        'traced_peak_bytes': traced_peak,
+        'frame_bytes': int(frame.memory_usage(deep=True).sum())
+    }
+    return frame, report
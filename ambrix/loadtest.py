@@ -0,0 +1,121 @@
+"""Open-loop HTTP load test of the recommendation service at a target request rate"""
+import asyncio
+import json
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+class _ConnectionPool:
+    """Keep-alive connections to one host, opened on demand up to ``size``"""
+    
+    def __init__(self, host, port, size):
+        self.host, self.port = host, port
+        self._idle = asyncio.Queue()
+        self._slots = asyncio.Semaphore(size)
+    
+    async def request(self, method, path, body=b''):
+        async with self._slots:
+            reader, writer = self._idle.get_nowait() if not self._idle.empty() else \
+                await asyncio.open_connection(self.host, self.port)
+            try:
+                writer.write(
+                    f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+                status = int((await reader.readline()).split()[1])
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                payload = await reader.readexactly(int(headers.get('content-length', 0)))
+            except BaseException:
+                writer.close()
+                raise
+            if headers.get('connection', '').lower() == 'close':
+                writer.close()
+            else:
+                self._idle.put_nowait((reader, writer))
+            return status, payload
+    
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait()[1].close()
+
+def _request_for(endpoint, user_ids, algorithm, n, batch_size, rng):
+    """(method, path, body) of one request to ``endpoint`` for random users"""
+    if endpoint == 'recommend':
+        query = urlencode({'user_id': user_ids[rng.integers(len(user_ids))], 'algorithm': algorithm, 'n': n})
+        return 'GET', f'/recommend?{query}', b''
+    if endpoint == 'batch':
+        users = [str(user_ids[i]) for i in rng.integers(len(user_ids), size=batch_size)]
+        return 'POST', '/recommend/batch', json.dumps({'user_ids': users, 'algorithm': algorithm, 'n': n}).encode()
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+async def _run(url, rps, duration, user_ids, endpoint, algorithm, n, batch_size, connections, timeout, seed):
+    address = urlsplit(url)
+    pool = _ConnectionPool(address.hostname, address.port or 80, connections)
+    rng = np.random.default_rng(seed)
+    latencies, statuses = [], {}
+    
+    async def send(scheduled, request):
+        try:
+            status, _ = await asyncio.wait_for(pool.request(*request), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status = 'error'
+        # Latency runs from the scheduled send time, so client-side queueing is not hidden
+        latencies.append(time.perf_counter() - scheduled)
+        statuses[status] = statuses.get(status, 0) + 1
+    
+    # Open loop: requests go out on a fixed schedule whether or not earlier ones have returned
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(rps * duration)):
+        scheduled = start + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        request = _request_for(endpoint, user_ids, algorithm, n, batch_size, rng)
+        tasks.append(asyncio.ensure_future(send(scheduled, request)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    pool.close()
+    
+    milliseconds = np.asarray(latencies) * 1000
+    return {
+        'config': {
+            'url': url, 'endpoint': endpoint, 'algorithm': algorithm, 'n': n, 'target_rps': rps,
+            'duration_seconds': duration, 'connections': connections,
+            'batch_size': batch_size if endpoint == 'batch' else 1
+        },
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status != 200),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'achieved_rps': len(latencies) / elapsed,
+        'latency': {
+            'p50_ms': float(np.percentile(milliseconds, 50)),
+            'p90_ms': float(np.percentile(milliseconds, 90)),
+            'p99_ms': float(np.percentile(milliseconds, 99)),
+            'max_ms': float(milliseconds.max()),
+            'mean_ms': float(milliseconds.mean())
+        } if len(milliseconds) else {}
+    }
+
+def run_load_test(url, user_ids, rps=100, duration=10, endpoint='recommend', algorithm='hybrid', n=3,
+                  batch_size=32, connections=64, timeout=10.0, seed=0):
+    """Send ``rps`` requests per second for ``duration`` seconds and report latency percentiles
+
+    Requests are scheduled open loop, so a slow server shows up as growing
+    latency instead of a lower send rate. ``endpoint`` is ``recommend``
+    (one random user per request) or ``batch`` (``batch_size`` users).
+    """
+    if not len(user_ids):
+        raise ValueError("No user ids to request")
+    if rps <= 0 or duration <= 0:
+        raise ValueError("rps and duration must be positive")
+    return asyncio.run(_run(url, rps, duration, np.asarray(user_ids, dtype=object), endpoint, algorithm, n,
+                            batch_size, connections, timeout, seed))
@@ -0,0 +1,215 @@
+"""Nearest-neighbour indexes over L2-normalized interaction rows"""
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from .topk import top_k_positions
+
+class ExactNeighborIndex:
+    """Brute-force cosine top-k over L2-normalized rows, computed in row blocks"""
+    
+    def __init__(self, normalized, block_size=2048, dense=None):
+        self.normalized = normalized
+        self.block_size = block_size
+        self._dense = dense
+    
+    def state(self):
+        return {'block_size': self.block_size}
+    
+    @classmethod
+    def from_state(cls, state, normalized, dense=None):
+        return cls(normalized, block_size=state['block_size'], dense=dense)
+    
+    def invalidate(self, positions, normalized, dense=None):
+        """Point at updated rows; exact search has no per-row state to refresh"""
+        self.normalized = normalized
+        self._dense = dense
+    
+    def scores(self, position):
+        """Similarity of one row to every row"""
+        if self._dense is not None:
+            return self._dense[position]
+        row = self.normalized[position]
+        return np.asarray((self.normalized @ row.T).todense()).ravel()
+    
+    def query(self, position, k):
+        """Return the k nearest rows to ``position``, excluding itself"""
+        return top_k_positions(self.scores(position), k, exclude=position)
+    
+    def query_many(self, positions, k):
+        """Return neighbour position and score arrays (len(positions) × k) in blocks"""
+        positions = np.asarray(positions)
+        k = min(k, self.normalized.shape[0] - 1)
+        neighbors = np.empty((len(positions), k), dtype=np.int64)
+        neighbor_scores = np.empty((len(positions), k), dtype=np.float64)
+        for start in range(0, len(positions), self.block_size):
+            block = positions[start:start + self.block_size]
+            block_scores = (self.normalized[block] @ self.normalized.T).toarray()
+            for offset, position in enumerate(block):
+                found, found_scores = top_k_positions(block_scores[offset], k, exclude=position)
+                neighbors[start + offset] = found
+                neighbor_scores[start + offset] = found_scores
+        return neighbors, neighbor_scores
+
+class IVFNeighborIndex:
+    """Approximate cosine top-k with an inverted-file (IVF) index
+
+    Rows are clustered with spherical k-means into ``n_lists`` cells; a query
+    scores only the rows in its ``n_probe`` closest cells. Raising ``n_probe``
+    trades latency for recall, up to exact search at ``n_probe == n_lists``.
+    Rows changed after clustering are kept in ``stale`` and searched by brute
+    force on every query until they exceed ``max_stale_fraction`` of the
+    index, at which point only those rows are reassigned to cells.
+    """
+    
+    def __init__(self, normalized, n_lists=None, n_probe=8, n_iter=10,
+                 max_train_rows=100_000, block_size=8192, max_stale_fraction=0.05, seed=0):
+        self.normalized = normalized.tocsr()
+        n_rows = self.normalized.shape[0]
+        self.n_lists = max(1, min(n_lists or int(np.sqrt(n_rows)), n_rows))
+        self.n_probe = n_probe
+        self.block_size = block_size
+        self.max_stale_fraction = max_stale_fraction
+        self.stale = np.empty(0, dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        
+        # Train centroids on a sample, then assign every row
+        train_rows = rng.choice(n_rows, min(n_rows, max_train_rows), replace=False)
+        self.centroids = self._train(self.normalized[train_rows], n_iter, rng)
+        assignments = self._assign(self.normalized)
+        
+        self._build_lists(assignments)
+    
+    def _build_lists(self, assignments):
+        # Inverted lists stored CSR-style: rows of list i are members[offsets[i]:offsets[i + 1]]
+        self.assignments = assignments
+        self.members = np.argsort(assignments, kind='stable')
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=self.n_lists))))
+    
+    def invalidate(self, positions, normalized, dense=None):
+        """Mark changed rows stale; reassign them once there are too many"""
+        self.normalized = normalized
+        extra_columns = normalized.shape[1] - self.centroids.shape[1]
+        if extra_columns:
+            # Posts first seen after clustering carry no centroid weight yet
+            self.centroids = np.hstack([self.centroids, np.zeros((self.n_lists, extra_columns))])
+        self.stale = np.union1d(self.stale, positions).astype(np.int64)
+        if len(self.stale) > self.max_stale_fraction * normalized.shape[0]:
+            assignments = np.concatenate([
+                self.assignments,
+                np.zeros(normalized.shape[0] - len(self.assignments), dtype=np.int64)
+            ])
+            assignments[self.stale] = self._assign(normalized[self.stale])
+            self._build_lists(assignments)
+            self.stale = np.empty(0, dtype=np.int64)
+    
+    def state(self):
+        return {
+            'n_lists': self.n_lists,
+            'n_probe': self.n_probe,
+            'block_size': self.block_size,
+            'max_stale_fraction': self.max_stale_fraction,
+            'centroids': self.centroids,
+            'assignments': self.assignments,
+            'members': self.members,
+            'offsets': self.offsets,
+            'stale': self.stale
+        }
+    
+    @classmethod
+    def from_state(cls, state, normalized, dense=None):
+        index = cls.__new__(cls)
+        index.normalized = normalized
+        for name, value in state.items():
+            setattr(index, name, value)
+        return index
+    
+    def _train(self, sample, n_iter, rng):
+        """Spherical k-means on the sampled rows"""
+        from sklearn.preprocessing import normalize
+        
+        centroids = sample[rng.choice(sample.shape[0], self.n_lists, replace=False)].toarray()
+        for _ in range(n_iter):
+            labels = np.asarray((sample @ centroids.T).argmax(axis=1)).ravel()
+            membership = sp.csr_matrix(
+                (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+                shape=(self.n_lists, sample.shape[0])
+            )
+            sums = np.asarray((membership @ sample).todense())
+            empty = np.flatnonzero(np.abs(sums).sum(axis=1) == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample.shape[0], len(empty))].toarray()
+            centroids = normalize(sums)
+        return centroids
+    
+    def _assign(self, rows):
+        labels = np.empty(rows.shape[0], dtype=np.int64)
+        for start in range(0, rows.shape[0], self.block_size):
+            block = rows[start:start + self.block_size]
+            labels[start:start + self.block_size] = np.asarray((block @ self.centroids.T).argmax(axis=1)).ravel()
+        return labels
+    
+    def query(self, position, k, n_probe=None):
+        """Return approximately the k nearest rows to ``position``, excluding itself"""
+        row = self.normalized[position]
+        centroid_scores = self.centroids[:, row.indices] @ row.data
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        probed = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        candidates = np.concatenate([
+            self.members[self.offsets[cell]:self.offsets[cell + 1]] for cell in probed
+        ])
+        # Stale rows may sit in the wrong cell, so they are always searched
+        candidates = np.union1d(candidates, self.stale)
+        candidates = candidates[candidates != position]
+        scores = np.asarray((self.normalized[candidates] @ row.T).todense()).ravel()
+        found, found_scores = top_k_positions(scores, k)
+        return candidates[found], found_scores
+    
+    def query_many(self, positions, k):
+        """Return neighbour position and score arrays (len(positions) × k)"""
+        results = [self.query(position, k) for position in positions]
+        width = min(k, self.normalized.shape[0] - 1)
+        neighbors = np.full((len(positions), width), -1, dtype=np.int64)
+        neighbor_scores = np.zeros((len(positions), width), dtype=np.float64)
+        for i, (found, found_scores) in enumerate(results):
+            neighbors[i, :len(found)] = found
+            neighbor_scores[i, :len(found)] = found_scores
+        return neighbors, neighbor_scores
+
+NEIGHBOR_INDEXES = {
+    'exact': ExactNeighborIndex,
+    'ivf': IVFNeighborIndex
+}
+
+def neighbor_recall_report(index, exact_index, k=5, sample_size=200, seed=0):
+    """Measure recall@k and per-query latency of ``index`` against exact search"""
+    n_rows = exact_index.normalized.shape[0]
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(n_rows, min(sample_size, n_rows), replace=False)
+    
+    recalls, approx_times, exact_times = [], [], []
+    for position in queries:
+        start = time.perf_counter()
+        truth, truth_scores = exact_index.query(position, k)
+        exact_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        found, found_scores = index.query(position, k)
+        approx_times.append(time.perf_counter() - start)
+        # Tie-aware: any neighbour scoring at least the exact k-th score counts as a hit
+        if len(truth):
+            hits = np.count_nonzero(found_scores >= truth_scores[-1] - 1e-12)
+            recalls.append(min(hits, len(truth)) / len(truth))
+    
+    approx_ms = np.array(approx_times) * 1000
+    exact_ms = np.array(exact_times) * 1000
+    return {
+        'k': k,
+        'queries': len(queries),
+        'recall_at_k': float(np.mean(recalls)) if recalls else 1.0,
+        'approx_p50_ms': float(np.percentile(approx_ms, 50)),
+        'approx_p99_ms': float(np.percentile(approx_ms, 99)),
+        'exact_p50_ms': float(np.percentile(exact_ms, 50)),
+        'exact_p99_ms': float(np.percentile(exact_ms, 99)),
+        'speedup': float(exact_ms.mean() / max(approx_ms.mean(), 1e-9))
+    }
@@ -0,0 +1,101 @@
+"""Precomputed popularity rankings for cold-start users"""
+import numpy as np
+import pandas as pd
+
+from .topk import merge_top_k, top_k_positions
+
+class PopularityIndex:
+    """Global, per-content_type and per-tag top-N post rankings
+
+    Rankings are stored as padded ``(groups, top_n)`` arrays of posts_df row
+    positions (``-1`` marks padding) with scores scaled to [0, 1] by the most
+    popular post, so a cold-start lookup is a dictionary hit and a slice.
+    """
+    
+    def __init__(self, popularity, eligible, content_types=None, post_tag_matrix=None, tag_index=None, top_n=100):
+        scores = np.where(eligible, popularity, -np.inf).astype(np.float64)
+        peak = scores[eligible].max() if eligible.any() else 0.0
+        self.scale = float(peak) if peak > 0 else 1.0
+        self.top_n = top_n
+        
+        self.global_rows, self.global_scores = self._rank([np.arange(len(scores))], scores)
+        
+        self.type_index = pd.Index([])
+        self.type_rows = self.type_scores = np.empty((0, top_n))
+        if content_types is not None:
+            codes, types = pd.factorize(content_types)
+            self.type_index = pd.Index(types)
+            groups = [np.flatnonzero(codes == code) for code in range(len(self.type_index))]
+            self.type_rows, self.type_scores = self._rank(groups, scores)
+        
+        self.tag_index = pd.Index([]) if tag_index is None else tag_index
+        self.tag_rows = self.tag_scores = np.empty((0, top_n))
+        if post_tag_matrix is not None:
+            by_tag = post_tag_matrix.tocsc()
+            groups = [by_tag.indices[by_tag.indptr[i]:by_tag.indptr[i + 1]] for i in range(by_tag.shape[1])]
+            self.tag_rows, self.tag_scores = self._rank(groups, scores)
+    
+    def _rank(self, groups, scores):
+        """Top-N rows and scaled scores per group, padded with -1"""
+        rows = np.full((len(groups), self.top_n), -1, dtype=np.int32)
+        ranked_scores = np.zeros((len(groups), self.top_n), dtype=np.float32)
+        for i, members in enumerate(groups):
+            members = members[np.isfinite(scores[members])]
+            found, found_scores = top_k_positions(scores[members], self.top_n)
+            rows[i, :len(found)] = members[found]
+            ranked_scores[i, :len(found)] = found_scores / self.scale
+        return rows, ranked_scores
+    
+    def state(self):
+        return {
+            'scale': self.scale,
+            'top_n': self.top_n,
+            'global_rows': self.global_rows,
+            'global_scores': self.global_scores,
+            'type_index': self.type_index,
+            'type_rows': self.type_rows,
+            'type_scores': self.type_scores,
+            'tag_index': self.tag_index,
+            'tag_rows': self.tag_rows,
+            'tag_scores': self.tag_scores
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        index = cls.__new__(cls)
+        for name, value in state.items():
+            setattr(index, name, value)
+        return index
+    
+    @staticmethod
+    def _trim(rows, scores, n):
+        valid = rows[:n] >= 0
+        return rows[:n][valid].astype(np.int64), scores[:n][valid].astype(np.float64)
+    
+    def top(self, n, content_type=None, tag=None):
+        """Return (post rows, scores) for the global, content_type or tag ranking"""
+        if content_type is not None:
+            position = self.type_index.get_indexer([content_type])[0]
+            if position < 0:
+                return self._trim(np.empty(0, dtype=np.int64), np.empty(0), n)
+            return self._trim(self.type_rows[position], self.type_scores[position], n)
+        if tag is not None:
+            position = self.tag_index.get_indexer([tag])[0]
+            if position < 0:
+                return self._trim(np.empty(0, dtype=np.int64), np.empty(0), n)
+            return self._trim(self.tag_rows[position], self.tag_scores[position], n)
+        return self._trim(self.global_rows[0], self.global_scores[0], n)
+    
+    def for_tags(self, positions, n):
+        """Merge the rankings of several tag positions; falls back to global when there are none"""
+        if len(positions) == 0 or len(self.tag_rows) == 0:
+            return self.top(n)
+        # Each tag ranking is already ordered, so a heap merge reads only their heads
+        streams = [
+            (rows[rows >= 0], scores[rows >= 0])
+            for rows, scores in zip(self.tag_rows[positions], self.tag_scores[positions])
+        ]
+        found, found_scores = merge_top_k(streams, n)
+        if len(found) == 0:
+            return self.top(n)
+        return found, found_scores
@@ -0,0 +1,150 @@
+"""Process-wide registry of shared, read-only recommendation engines
+
+Sessions that upload identical datasets get the same engine instance. Entries
+are keyed by a content hash of the input files, reference counted through
+``ModelLease`` objects, and evicted least-recently-used once the registry
+exceeds its memory budget and no lease holds them.
+"""
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+DEFAULT_MEMORY_BUDGET_BYTES = int(os.environ.get('AMBRIX_MODEL_CACHE_MB', 2048)) * 1024 ** 2
+
+def _iter_chunks(source, chunk_size=1 << 20):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    elif hasattr(source, 'getvalue'):
+        yield source.getvalue()
+    else:
+        position = source.tell()
+        source.seek(0)
+        while chunk := source.read(chunk_size):
+            yield chunk.encode() if isinstance(chunk, str) else chunk
+        source.seek(position)
+
+def content_key(*sources):
+    """Hash the contents of paths, uploaded files or file-like objects"""
+    digest = hashlib.sha256()
+    for source in sources:
+        file_digest = hashlib.sha256()
+        for chunk in _iter_chunks(source):
+            file_digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+        digest.update(file_digest.digest())
+    return digest.hexdigest()
+
+class ModelLease:
+    """A session's reference to a shared engine; releases itself when collected"""
+    
+    def __init__(self, registry, key, engine):
+        self.key = key
+        self.engine = engine
+        self._finalizer = weakref.finalize(self, registry.release, key)
+    
+    def release(self):
+        self._finalizer()
+    
+    @property
+    def active(self):
+        return self._finalizer.alive
+
+class _Entry:
+    __slots__ = ('engine', 'nbytes', 'refcount')
+    
+    def __init__(self, engine, nbytes):
+        self.engine = engine
+        self.nbytes = nbytes
+        self.refcount = 0
+
+class ModelRegistry:
+    """LRU cache of engines bounded by ``memory_budget_bytes``
+
+    Entries still referenced by a lease are never evicted, so the budget can
+    be exceeded temporarily while every cached model is in use.
+    """
+    
+    def __init__(self, memory_budget_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def acquire(self, key, loader):
+        """Return a lease on the engine for ``key``, calling ``loader()`` on a miss
+
+        Concurrent callers for the same key wait for a single load.
+        """
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self.hits += 1
+                        return self._lease(key, entry)
+                engine = loader()
+                nbytes = engine.memory_usage()
+                with self._lock:
+                    self.misses += 1
+                    entry = self._entries.setdefault(key, _Entry(engine, nbytes))
+                    lease = self._lease(key, entry)
+                    self._evict()
+                    return lease
+        finally:
+            # Also after a failed load, so the key lock does not leak; waiters still hold their reference
+            with self._lock:
+                if self._loading.get(key) is key_lock:
+                    del self._loading[key]
+    
+    def _lease(self, key, entry):
+        entry.refcount += 1
+        self._entries.move_to_end(key)
+        return ModelLease(self, key, entry.engine)
+    
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.refcount > 0:
+                entry.refcount -= 1
+            self._evict()
+    
+    def _evict(self):
+        """Drop idle entries, least recently used first, until within budget"""
+        # Lazy models are built after load, so sizes are re-measured before each pass
+        for entry in self._entries.values():
+            entry.nbytes = entry.engine.memory_usage()
+        total = sum(entry.nbytes for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.memory_budget_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refcount == 0:
+                total -= entry.nbytes
+                del self._entries[key]
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop every idle entry"""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.refcount == 0]:
+                del self._entries[key]
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'models': len(self._entries),
+                'bytes': sum(entry.nbytes for entry in self._entries.values()),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'active_leases': sum(entry.refcount for entry in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,285 @@
+"""Async HTTP recommendation service with micro-batched scoring (stdlib asyncio only)
+
+Endpoints::
+
+    GET  /recommend?user_id=U1&algorithm=hybrid&n=3
+    POST /recommend/batch   {"user_ids": [...], "algorithm": "hybrid", "n": 3}
+    GET  /similar-posts?post_id=P1&n=3
+    GET  /health
+    GET  /metrics           engine metrics in the Prometheus text format
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+MAX_RECOMMENDATIONS = 1000
+
+class MicroBatcher:
+    """Coalesces concurrent single-user requests into ``recommend_batch`` calls
+
+    Requests for the same (algorithm, n) are held for at most
+    ``max_wait_ms`` after the first one arrives, or until
+    ``max_batch_size`` are pending, then scored together on ``executor``
+    so the event loop keeps accepting requests meanwhile. At most
+    ``workers`` batches score at once; requests arriving while all are
+    busy join the next batch, so batches grow with load. Users with a
+    result in the engine's ``ResultCache`` are answered from it, and the
+    rest are stored there after scoring, as ``recommend`` would.
+    """
+    
+    def __init__(self, engine, executor, max_batch_size=64, max_wait_ms=2.0, workers=1):
+        self.engine = engine
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._slots = asyncio.Semaphore(workers)
+        self._pending = {}
+        self._timers = {}
+        self._scheduled = set()
+        self._running = set()
+    
+    async def recommend(self, user_id, algorithm='hybrid', n=3):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (algorithm, n)
+        pending = self._pending.setdefault(key, [])
+        pending.append((user_id, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+    
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if key not in self._scheduled:
+            self._scheduled.add(key)
+            task = asyncio.ensure_future(self._score(key))
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+    
+    async def _score(self, key):
+        async with self._slots:
+            # The batch is taken only once a slot is free, so it includes requests that queued meanwhile
+            self._scheduled.discard(key)
+            pending = self._pending.pop(key, [])
+            batch, rest = pending[:self.max_batch_size], pending[self.max_batch_size:]
+            if rest:
+                self._pending[key] = rest
+                self._flush(key)
+            if not batch:
+                return
+            
+            algorithm, n = key
+            user_ids = list(dict.fromkeys(user_id for user_id, _ in batch))
+            self.engine.metrics.count('service_batches')
+            self.engine.metrics.count('service_batched_requests', len(batch))
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, cached_batch_records, self.engine, user_ids, algorithm, n
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for user_id, future in batch:
+                if not future.done():
+                    future.set_result(results[user_id])
+
+def batch_records(engine, user_ids, algorithm, n):
+    """``recommend_batch`` results as {user_id: recommendation dicts}, like ``recommend``"""
+    frame = engine.recommend_batch(user_ids, algorithm, n)
+    results = {user_id: [] for user_id in user_ids}
+    for user_id, post_id, score in zip(frame['user_id'].values, frame['post_id'].values, frame['score'].values):
+        metadata = engine.post_metadata(post_id) or {}
+        results[user_id].append({
+            'post_id': post_id,
+            'score': float(score),
+            'content_type': metadata.get('content_type'),
+            'tags': metadata.get('tags'),
+            'creator_id': metadata.get('creator_id')
+        })
+    return results
+
+def cached_batch_records(engine, user_ids, algorithm, n):
+    """``batch_records`` that reads and fills ``engine.result_cache`` like the single-user methods"""
+    cache = engine.result_cache
+    if cache is None:
+        return batch_records(engine, user_ids, algorithm, n)
+    results, generations = {}, {}
+    model_version = engine.model_version
+    for user_id in user_ids:
+        records = cache.get((user_id, algorithm, n, model_version))
+        engine.metrics.cache('results', records is not None)
+        if records is None:
+            generations[user_id] = cache.generation(user_id)
+        else:
+            results[user_id] = [dict(record, score=float(record['score'])) for record in records]
+    if generations:
+        scored = batch_records(engine, list(generations), algorithm, n)
+        for user_id, generation in generations.items():
+            cache.put((user_id, algorithm, n, model_version), scored[user_id], generation)
+            results[user_id] = [dict(record) for record in scored[user_id]]
+    return results
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _json_default(value):
+    # numpy scalars and other non-JSON ids
+    return value.item() if hasattr(value, 'item') else str(value)
+
+def _count(params, default=3):
+    try:
+        n = int(params.get('n', default))
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "n must be an integer") from None
+    if not 1 <= n <= MAX_RECOMMENDATIONS:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"n must be between 1 and {MAX_RECOMMENDATIONS}")
+    return n
+
+def _identifier(params, name):
+    value = params.get(name)
+    if value is None:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} is required")
+    if not isinstance(value, str):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a string")
+    return value
+
+class RecommendationService:
+    """HTTP/1.1 front end for a fitted ``ContentRecommendationSystem``"""
+    
+    def __init__(self, engine, max_batch_size=64, max_wait_ms=2.0, workers=1):
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ambrix-score')
+        self.batcher = MicroBatcher(engine, self.executor, max_batch_size, max_wait_ms, workers)
+        self.routes = {
+            ('GET', '/recommend'): self.recommend,
+            ('POST', '/recommend'): self.recommend,
+            ('POST', '/recommend/batch'): self.recommend_batch,
+            ('GET', '/similar-posts'): self.similar_posts,
+            ('GET', '/health'): self.health,
+            ('GET', '/metrics'): self.metrics
+        }
+    
+    def _algorithm(self, params):
+        algorithm = params.get('algorithm', 'hybrid')
+        if not isinstance(algorithm, str) or algorithm not in self.engine.BATCH_ALGORITHMS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown algorithm: {algorithm}")
+        return algorithm
+    
+    async def recommend(self, params):
+        user_id = _identifier(params, 'user_id')
+        algorithm, n = self._algorithm(params), _count(params)
+        with self.engine.metrics.request(f'http_{algorithm}'):
+            recommendations = await self.batcher.recommend(user_id, algorithm, n)
+        return {'user_id': user_id, 'algorithm': algorithm, 'recommendations': recommendations}
+    
+    async def recommend_batch(self, params):
+        user_ids = params.get('user_ids')
+        if not isinstance(user_ids, list) or not user_ids or not all(isinstance(user_id, str) for user_id in user_ids):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "user_ids must be a non-empty list of strings")
+        algorithm, n = self._algorithm(params), _count(params)
+        unique = list(dict.fromkeys(user_ids))
+        results = await asyncio.get_running_loop().run_in_executor(
+            self.executor, batch_records, self.engine, unique, algorithm, n
+        )
+        return {
+            'algorithm': algorithm,
+            'results': [{'user_id': user_id, 'recommendations': results[user_id]} for user_id in user_ids]
+        }
+    
+    async def similar_posts(self, params):
+        post_id = _identifier(params, 'post_id')
+        n = _count(params)
+        similar = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.engine.similar_posts, post_id, n
+        )
+        return {'post_id': post_id, 'similar': similar}
+    
+    async def health(self, params):
+        return {'status': 'ok', 'artifact_version': self.engine.artifact_version}
+    
+    async def metrics(self, params):
+        return self.engine.metrics.prometheus()
+    
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {url.path}")
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {url.path}")
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON") from None
+            if not isinstance(payload, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+            params.update(payload)
+        return await handler(params)
+    
+    async def handle(self, reader, writer):
+        """Serve one keep-alive connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                
+                try:
+                    status, payload = HTTPStatus.OK, await self._dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except ValueError as e:
+                    status, payload = HTTPStatus.BAD_REQUEST, {'error': str(e)}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+                
+                if isinstance(payload, str):
+                    content_type, data = 'text/plain; version=0.0.4', payload.encode()
+                else:
+                    content_type, data = 'application/json', json.dumps(payload, default=_json_default).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    async def start(self, host='127.0.0.1', port=8000):
+        """Start listening and return the ``asyncio.Server``"""
+        return await asyncio.start_server(self.handle, host, port)
+
+async def serve(engine, host='127.0.0.1', port=8000, max_batch_size=64, max_wait_ms=2.0, workers=1):
+    """Run the service until cancelled"""
+    service = RecommendationService(engine, max_batch_size, max_wait_ms, workers)
+    server = await service.start(host, port)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,192 @@
+"""Cached user-user and item-item cosine similarity"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from .interactions import resized
+from .neighbors import NEIGHBOR_INDEXES, ExactNeighborIndex, neighbor_recall_report
+from .topk import top_k_rows
+
+class UserSimilarityIndex:
+    """Cosine user-user similarity over L2-normalized interaction rows
+
+    ``mode='on_demand'`` computes a single user's similarity row per query
+    against the sparse normalized matrix; ``mode='precomputed'`` materializes
+    the full dense N×N matrix once, which only pays off for small user bases.
+    Nearest-neighbour lookups go through a pluggable index from
+    ``NEIGHBOR_INDEXES`` (``'exact'`` or the approximate ``'ivf'``).
+    """
+    
+    MODES = ('on_demand', 'precomputed')
+    
+    def __init__(self, interactions, mode='on_demand', neighbor_index='exact', neighbor_params=None):
+        from sklearn.preprocessing import normalize
+        
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown similarity mode: {mode}")
+        if neighbor_index not in NEIGHBOR_INDEXES:
+            raise ValueError(f"Unknown neighbour index: {neighbor_index}")
+        self.mode = mode
+        self.neighbor_index = neighbor_index
+        self.interactions = interactions
+        self.user_ids = interactions.user_ids
+        self.normalized = normalize(interactions.csr)
+        self._dense = None
+        if mode == 'precomputed':
+            self._dense = (self.normalized @ self.normalized.T).toarray()
+        
+        params = dict(neighbor_params or {})
+        if neighbor_index == 'exact':
+            params.setdefault('dense', self._dense)
+        self.neighbors = NEIGHBOR_INDEXES[neighbor_index](self.normalized, **params)
+        self._exact = self.neighbors if neighbor_index == 'exact' else None
+    
+    def state(self):
+        """Return the arrays needed to rebuild this index with ``from_state``"""
+        return {
+            'mode': self.mode,
+            'neighbor_index': self.neighbor_index,
+            'normalized': self.normalized,
+            'dense': self._dense,
+            'neighbors': self.neighbors.state()
+        }
+    
+    @classmethod
+    def from_state(cls, state, interactions):
+        index = cls.__new__(cls)
+        index.mode = state['mode']
+        index.neighbor_index = state['neighbor_index']
+        index.interactions = interactions
+        index.user_ids = interactions.user_ids
+        index.normalized = state['normalized']
+        index._dense = state['dense']
+        index.neighbors = NEIGHBOR_INDEXES[index.neighbor_index].from_state(
+            state['neighbors'], index.normalized, index._dense
+        )
+        index._exact = index.neighbors if index.neighbor_index == 'exact' else None
+        return index
+    
+    def update_users(self, positions):
+        """Refresh the normalized rows of users whose interactions changed
+
+        Only the touched rows are renormalized. Users appended to the
+        interaction matrix since the last call are included automatically.
+        The neighbour index is told which rows went stale and decides lazily
+        when to re-cluster them.
+        """
+        from sklearn.preprocessing import normalize
+        
+        n_users = self.interactions.shape[0]
+        old_rows = self.normalized.shape[0]
+        positions = np.union1d(positions, np.arange(old_rows, n_users)).astype(np.int64)
+        self.user_ids = self.interactions.user_ids
+        if len(positions) == 0:
+            return
+        
+        normalized = resized(self.normalized, self.interactions.shape)
+        fresh = normalize(self.interactions.csr[positions])
+        selector = sp.csr_matrix(
+            (np.ones(len(positions)), (positions, np.arange(len(positions)))),
+            shape=(n_users, len(positions))
+        )
+        self.normalized = normalized - selector @ normalized[positions] + selector @ fresh
+        self.normalized.eliminate_zeros()
+        
+        if self._dense is not None:
+            if n_users != old_rows:
+                self._dense = (self.normalized @ self.normalized.T).toarray()
+            else:
+                touched = (self.normalized[positions] @ self.normalized.T).toarray()
+                if not self._dense.flags.writeable:  # read-only memory map after load()
+                    self._dense = np.array(self._dense)
+                self._dense[positions] = touched
+                self._dense[:, positions] = touched.T
+        self.neighbors.invalidate(positions, self.normalized, self._dense)
+        if self._exact is not None and self._exact is not self.neighbors:
+            self._exact = None
+    
+    def __contains__(self, user_id):
+        return user_id in self.interactions
+    
+    def similarity_vector(self, user_id):
+        """Return the similarity of ``user_id`` to every user as an array"""
+        position = self.interactions.user_position(user_id)
+        if self._dense is not None:
+            return self._dense[position]
+        row = self.normalized[position]
+        return np.asarray((self.normalized @ row.T).todense()).ravel()
+    
+    def similarities(self, user_id):
+        """Return the similarity of ``user_id`` to every user as a Series"""
+        return pd.Series(self.similarity_vector(user_id), index=self.user_ids)
+    
+    def nearest(self, user_id, k=5):
+        """Return the k most similar other users as a Series, most similar first"""
+        positions, scores = self.neighbors.query(self.interactions.user_position(user_id), k)
+        return pd.Series(scores, index=self.user_ids[positions])
+    
+    def recall_report(self, k=5, sample_size=200, seed=0):
+        """Compare the configured neighbour index with exact search"""
+        if self._exact is None:
+            self._exact = ExactNeighborIndex(self.normalized, dense=self._dense)
+        return neighbor_recall_report(self.neighbors, self._exact, k, sample_size, seed)
+    
+    def to_frame(self):
+        """Return the full N×N similarity matrix as a DataFrame"""
+        dense = self._dense if self._dense is not None else (self.normalized @ self.normalized.T).toarray()
+        return pd.DataFrame(dense, index=self.user_ids, columns=self.user_ids)
+
+class ItemSimilarityIndex:
+    """Precomputed top-k cosine neighbour lists between posts
+
+    Posts are compared by the users who liked them. Row ``i`` of the CSR
+    ``neighbors`` holds the up to ``k`` posts most similar to post ``i``
+    (int32 columns, float32 scores), so the item-based scores of a block of
+    users are one sparse product of their liked rows with ``neighbors``.
+    Similarities are computed in blocks of rows bounded by ``max_block_cells``
+    dense cells, so memory stays flat as the catalog grows.
+    """
+    
+    def __init__(self, liked, k=20, max_block_cells=1 << 24):
+        from sklearn.preprocessing import normalize
+        
+        self.k = k
+        normalized = normalize(liked.T.tocsr().astype(np.float32))
+        n_posts = normalized.shape[0]
+        block_size = max(1, max_block_cells // max(n_posts, 1))
+        rows, columns, scores = [], [], []
+        for start in range(0, n_posts, block_size):
+            block = (normalized[start:start + block_size] @ normalized.T).toarray()
+            block_rows = np.arange(start, start + block.shape[0])
+            block[block_rows - start, block_rows] = 0
+            found, found_scores = top_k_rows(block, k)
+            # Posts sharing no likers are not neighbours
+            keep = found_scores > 0
+            rows.append(np.broadcast_to(block_rows[:, None], found.shape)[keep])
+            columns.append(found[keep])
+            scores.append(found_scores[keep])
+        self.neighbors = sp.csr_matrix(
+            (np.concatenate(scores), (np.concatenate(rows), np.concatenate(columns))),
+            shape=(n_posts, n_posts), dtype=np.float32
+        )
+        self.neighbors.sort_indices()
+    
+    def state(self):
+        return {'k': self.k, 'neighbors': self.neighbors}
+    
+    @classmethod
+    def from_state(cls, state):
+        index = cls.__new__(cls)
+        index.k = state['k']
+        index.neighbors = state['neighbors']
+        return index
+    
+    def similar(self, post_row, k=None):
+        """Return (post rows, scores) of a post's neighbours, most similar first"""
+        start, end = self.neighbors.indptr[post_row], self.neighbors.indptr[post_row + 1]
+        order = np.lexsort((self.neighbors.indices[start:end], -self.neighbors.data[start:end]))[:k]
+        return self.neighbors.indices[start:end][order], self.neighbors.data[start:end][order]
+    
+    def scores(self, liked_rows):
+        """Sum of neighbour similarities over each user's liked posts (sparse users × posts)"""
+        return sp.csr_matrix(liked_rows @ self.neighbors)
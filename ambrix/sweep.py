@@ -0,0 +1,137 @@
+"""Hyperparameter sweeps over a fitted engine with a quality-vs-latency Pareto table"""
+import itertools
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .evaluation import prepare_split, ranking_metrics
+
+def parameter_grid(space):
+    """Every combination of ``space`` (parameter name -> list of values) as dicts"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_trials(space, n_trials, seed=0):
+    """``n_trials`` distinct combinations of ``space`` drawn uniformly without replacement"""
+    names = list(space)
+    sizes = [len(space[name]) for name in names]
+    total = int(np.prod(sizes))
+    if n_trials >= total:
+        return parameter_grid(space)
+    trials = []
+    # Decode each sampled grid index as a mixed-radix number, so the grid is never materialized
+    for index in np.random.default_rng(seed).choice(total, n_trials, replace=False):
+        index, trial = int(index), {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            index, position = divmod(index, size)
+            trial[name] = space[name][position]
+        trials.append({name: trial[name] for name in names})
+    return trials
+
+def pareto_front(quality, latency):
+    """Mask of trials no other trial beats on quality (higher) and latency (lower) at once"""
+    quality, latency = np.asarray(quality), np.asarray(latency)
+    no_worse = (quality[None, :] >= quality[:, None]) & (latency[None, :] <= latency[:, None])
+    better = (quality[None, :] > quality[:, None]) | (latency[None, :] < latency[:, None])
+    return ~(no_worse & better).any(axis=1)
+
+def _run_trial(engine, params, context):
+    """Configure the engine, score every evaluated user and time single requests"""
+    algorithm, user_ids, latency_users, relevant, popularity, k = context
+    engine.configure(**params)
+    
+    # The first request rebuilds any index the new parameters invalidated
+    start = time.perf_counter()
+    engine.recommend(latency_users[0], algorithm, k)
+    build_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    recommendations = engine.recommend_batch(user_ids, algorithm, k, n_jobs=1)
+    batch_seconds = time.perf_counter() - start
+    
+    latencies = []
+    for user_id in latency_users:
+        start = time.perf_counter()
+        engine.recommend(user_id, algorithm, k)
+        latencies.append(time.perf_counter() - start)
+    
+    result = ranking_metrics(recommendations, relevant, k, popularity)
+    result.update({
+        'build_seconds': build_seconds,
+        'batch_ms_per_user': batch_seconds * 1000 / max(len(user_ids), 1),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000)
+    })
+    return result
+
+# Fitted engine and scoring inputs of a worker process
+_WORKER = None
+
+def _init_worker(artifact_dir, context):
+    global _WORKER
+    from .engine import ContentRecommendationSystem
+    
+    _WORKER = (ContentRecommendationSystem.load(artifact_dir), context)
+
+def _worker_trial(params):
+    engine, context = _WORKER
+    return _run_trial(engine, params, context)
+
+def _label(value):
+    if isinstance(value, dict):
+        return ' '.join(f'{name}={weight:g}' for name, weight in value.items())
+    return value
+
+def sweep(users_df, posts_df, engagements_df, space, algorithm='hybrid', search='grid', n_trials=20, k=10,
+          strategy='random', test_fraction=0.2, seed=0, n_jobs=1, latency_queries=50, objective='ndcg',
+          latency='p50_ms', engine_params=None):
+    """Evaluate parameter combinations on one fitted engine; returns a results DataFrame
+
+    ``space`` maps ``configure`` parameters (``hybrid_weights``,
+    ``hybrid_normalization``, ``collaborative_neighbors``,
+    ``tfidf_max_features``, ``item_neighbors``, ...) to candidate values;
+    ``search`` is ``grid`` or ``random`` (``n_trials`` draws). The split is
+    fitted once and every trial reconfigures the same engine, so only the
+    indexes a parameter affects are rebuilt. With ``n_jobs`` > 1 trials run
+    in worker processes that memory-map one saved artifact. Each row has
+    the trial's parameters, ``ranking_metrics``, batch ms per user and
+    single-request p50/p99 over ``latency_queries`` users; ``pareto`` marks
+    trials not dominated on (``objective``, ``latency``).
+    """
+    if search not in ('grid', 'random'):
+        raise ValueError(f"Unknown search: {search}")
+    from .engine import ContentRecommendationSystem
+    
+    # Unknown names fail before the split is fitted
+    unknown = [name for name in space if name not in ContentRecommendationSystem().config()]
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(unknown)}")
+    trials = parameter_grid(space) if search == 'grid' else random_trials(space, n_trials, seed)
+    # Latencies measure live scoring, so the result cache is off unless asked for
+    engine, relevant, popularity, _ = prepare_split(
+        users_df, posts_df, engagements_df, strategy, test_fraction, seed,
+        {'result_cache_size': 0, **(engine_params or {})}
+    )
+    user_ids = relevant['user_id'].unique()
+    latency_users = np.random.default_rng(seed).choice(user_ids, min(latency_queries, len(user_ids)), replace=False)
+    context = (algorithm, user_ids, latency_users, relevant, popularity, k)
+    
+    if n_jobs == 1:
+        results = [_run_trial(engine, params, context) for params in trials]
+    else:
+        with tempfile.TemporaryDirectory() as artifact_dir:
+            # Trials reconfigure the engine and rebuild what they use, so lazy models are not built here
+            engine.save(artifact_dir, build=False)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(artifact_dir, context)) as pool:
+                results = list(pool.map(_worker_trial, trials))
+    
+    table = pd.DataFrame([
+        {**{name: _label(value) for name, value in params.items()}, **result}
+        for params, result in zip(trials, results)
+    ])
+    table['pareto'] = pareto_front(table[objective], table[latency])
+    return table.sort_values(objective, ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,111 @@
+"""Deterministic synthetic Users/Posts/Engagements tables in the README schema"""
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TAGS = ('sports', 'art', 'gaming', 'travel', 'food', 'fashion', 'music', 'tech', 'fitness', 'books')
+CONTENT_TYPES = ('video', 'image', 'text')
+TABLE_FILES = {'users': 'Users', 'posts': 'Posts', 'engagements': 'Engagements'}
+
+def tag_vocabulary(n_tags):
+    """The README tags first, then ``tag11``, ``tag12``, ... up to ``n_tags``"""
+    return list(DEFAULT_TAGS[:n_tags]) + [f'tag{i}' for i in range(len(DEFAULT_TAGS) + 1, n_tags + 1)]
+
+def _power_law(n, exponent, rng):
+    """Zipf-like weights over ``n`` items in random rank order, summing to 1"""
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    return rng.permutation(weights / weights.sum())
+
+def _tag_sets(n_rows, n_tags, sizes, tag_weights, rng):
+    """Distinct tag indices per row as a (n_rows, max(sizes)) array padded with -1"""
+    width = int(sizes.max())
+    # Gumbel top-k draws weighted tags without replacement, vectorized over rows
+    keys = np.log(tag_weights) - np.log(-np.log(rng.random((n_rows, n_tags))))
+    picks = np.argsort(-keys, axis=1)[:, :width]
+    picks[np.arange(width) >= sizes[:, None]] = -1
+    return picks
+
+def _join_tags(picks, tags):
+    """Comma-separated tag strings, one per row of ``picks``"""
+    names = np.append(np.asarray(tags, dtype=object), '')
+    columns = [names[picks[:, i]] for i in range(picks.shape[1])]
+    joined = pd.Series(columns[0])
+    for column in columns[1:]:
+        joined = joined.str.cat(pd.Series(column), sep=', ').str.rstrip(', ')
+    return joined.values
+
+def _masks(picks):
+    """Bit mask of the tags in each row of ``picks``"""
+    bits = np.where(picks >= 0, np.left_shift(np.int64(1), np.maximum(picks, 0)), 0)
+    return np.bitwise_or.reduce(bits, axis=1)
+
+def generate_dataset(n_users=10_000, n_posts=2_000, density=0.005, n_tags=10, popularity_exponent=1.1,
+                     activity_exponent=0.8, like_rate=0.35, interest_boost=0.4, timestamps=False, seed=0):
+    """Generate (users_df, posts_df, engagements_df) with a fixed seed
+
+    About ``density × n_users × n_posts`` engagements are drawn. Posts are
+    picked with power-law popularity (``popularity_exponent``) and users with
+    power-law activity (``activity_exponent``), so a few posts and users
+    dominate as in production traffic. An engagement is a like (1) with
+    probability ``like_rate``, plus ``interest_boost`` when the post shares a
+    tag with the user's interests, which gives the recommenders real signal.
+    ``timestamps`` adds epoch-second times spread over the last 30 days.
+    """
+    if not 1 <= n_tags <= 62:
+        raise ValueError("n_tags must be between 1 and 62")
+    rng = np.random.default_rng(seed)
+    tags = tag_vocabulary(n_tags)
+    tag_weights = _power_law(n_tags, 0.5, rng)
+    
+    # Users: three interests each (fewer when the vocabulary is smaller)
+    interest_sizes = np.full(n_users, min(3, n_tags))
+    interests = _tag_sets(n_users, n_tags, interest_sizes, tag_weights, rng)
+    users_df = pd.DataFrame({
+        'user_id': [f'U{i}' for i in range(1, n_users + 1)],
+        'age': rng.integers(18, 65, n_users),
+        'gender': rng.choice(['F', 'M'], n_users),
+        'top_3_interests': _join_tags(interests, tags),
+        'past_engagement_score': rng.random(n_users).round(2)
+    })
+    
+    # Posts: one to three tags, created by existing users
+    post_tags = _tag_sets(n_posts, n_tags, rng.integers(1, min(3, n_tags) + 1, n_posts), tag_weights, rng)
+    posts_df = pd.DataFrame({
+        'post_id': [f'P{i}' for i in range(1, n_posts + 1)],
+        'creator_id': [f'U{i}' for i in rng.integers(1, n_users + 1, n_posts)],
+        'content_type': rng.choice(CONTENT_TYPES, n_posts),
+        'tags': _join_tags(post_tags, tags)
+    })
+    
+    # Engagements: power-law users × power-law posts, likes boosted by shared interests
+    n_engagements = max(1, int(round(density * n_users * n_posts)))
+    users = rng.choice(n_users, n_engagements, p=_power_law(n_users, activity_exponent, rng))
+    posts = rng.choice(n_posts, n_engagements, p=_power_law(n_posts, popularity_exponent, rng))
+    shares_interest = (_masks(interests)[users] & _masks(post_tags)[posts]) != 0
+    liked = rng.random(n_engagements) < like_rate + interest_boost * shares_interest
+    engagements_df = pd.DataFrame({
+        'user_id': users_df['user_id'].values[users],
+        'post_id': posts_df['post_id'].values[posts],
+        'engagement': liked.astype(np.int8)
+    })
+    if timestamps:
+        now = 1_700_000_000
+        engagements_df['timestamp'] = np.sort(rng.integers(now - 30 * 86_400, now, n_engagements))
+    return users_df, posts_df, engagements_df
+
+def write_dataset(frames, directory, fmt='csv'):
+    """Write generated frames as Users/Posts/Engagements files; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    extension = {'csv': 'csv', 'parquet': 'parquet', 'arrow': 'arrow'}[fmt]
+    paths = []
+    for table, frame in zip(TABLE_FILES, frames):
+        path = os.path.join(directory, f'{TABLE_FILES[table]}.{extension}')
+        if fmt == 'csv':
+            frame.to_csv(path, index=False)
+        elif fmt == 'parquet':
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_feather(path)
+        paths.append(path)
+    return paths
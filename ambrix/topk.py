@@ -0,0 +1,79 @@
+"""Deterministic top-k selection shared by every recommender
+
+All helpers order by descending score and break ties by ascending position,
+so batch, single-user and streamed results agree exactly. Only the k
+winners are ever sorted.
+"""
+import heapq
+
+import numpy as np
+
+def top_k_positions(scores, k, exclude=None):
+    """Return (positions, scores) of the k largest scores, ties broken by position"""
+    if exclude is not None:
+        scores = scores.copy()
+        scores[exclude] = -np.inf
+    k = min(k, len(scores) - (0 if exclude is None else 1))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=scores.dtype)
+    candidates = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    # Widen the partition to every position tied with the k-th score so ties resolve by position
+    threshold = scores[candidates].min()
+    candidates = np.flatnonzero(scores >= threshold)
+    order = np.lexsort((candidates, -scores[candidates]))[:k]
+    return candidates[order], scores[candidates[order]]
+
+def top_k_rows(scores, k):
+    """Row-wise top_k_positions of a 2-D block with a single argpartition call
+
+    The partition allocates an index array as large as ``scores``, so callers
+    score in row blocks to bound memory.
+    """
+    n_rows, n_columns = scores.shape
+    k = min(k, n_columns)
+    if k <= 0:
+        return np.empty((n_rows, 0), dtype=np.int64), np.empty((n_rows, 0), dtype=scores.dtype)
+    if k < n_columns:
+        candidates = np.argpartition(scores, n_columns - k, axis=1)[:, n_columns - k:]
+    else:
+        candidates = np.tile(np.arange(n_columns), (n_rows, 1))
+    # Rows with more ties at the k-th score than the partition kept take the lowest tied positions
+    threshold = np.take_along_axis(scores, candidates, axis=1).min(axis=1, keepdims=True)
+    tied = np.flatnonzero(np.count_nonzero(scores >= threshold, axis=1) > k)
+    if len(tied):
+        block, block_threshold = scores[tied], threshold[tied]
+        keep = block > block_threshold
+        slots = k - np.count_nonzero(keep, axis=1)
+        # np.nonzero is row-major, so each row's tied positions come out ascending
+        rows, columns = np.nonzero(block == block_threshold)
+        within = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        lowest = within < slots[rows]
+        keep[rows[lowest], columns[lowest]] = True
+        candidates[tied] = np.nonzero(keep)[1].reshape(len(tied), k)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.lexsort((candidates, -candidate_scores), axis=1)
+    positions = np.take_along_axis(candidates, order, axis=1)
+    top_scores = np.take_along_axis(candidate_scores, order, axis=1)
+    return positions, top_scores
+
+def merge_top_k(streams, k):
+    """Top-k distinct positions from (positions, scores) streams, each already ranked
+
+    Streams are merged through a heap that stops after k distinct positions
+    instead of concatenating and re-ranking them. A position found in
+    several streams keeps its first (highest) score.
+    """
+    merged = heapq.merge(*(
+        zip((-np.asarray(scores, dtype=np.float64)).tolist(), np.asarray(positions).tolist())
+        for positions, scores in streams
+    ))
+    found, found_scores, seen = [], [], set()
+    for negative_score, position in merged:
+        if len(found) == k:
+            break
+        if position in seen:
+            continue
+        seen.add(position)
+        found.append(position)
+        found_scores.append(-negative_score)
+    return np.array(found, dtype=np.int64), np.array(found_scores, dtype=np.float64)
@@ -0,0 +1,174 @@
+"""Precomputed per-user top-N tables, materialized offline and served before live scoring
+
+A table set is a versioned artifact (see ``ambrix.artifacts``) with one
+table per algorithm: an ``offsets`` index over user codes plus flat int32
+post codes and float32 scores::
+
+    tables/
+        LATEST
+        20261018T120000-3f2a/
+            manifest.json              # n, engine config, id and data fingerprints
+            hybrid.offsets.npy         # int64, one entry per user code + 1
+            hybrid.post_codes.npy      # int32
+            hybrid.scores.npy          # float32
+            ...
+
+User code ``c`` owns ``post_codes[offsets[c]:offsets[c + 1]]``, so a
+lookup is a slice of memory-mapped arrays.
+"""
+import functools
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from .artifacts import load_state, save_state
+
+MATERIALIZED_ALGORITHMS = ('content', 'collaborative', 'hybrid')
+
+# Config parameters that do not change which posts are recommended
+_SERVING_ONLY = ('result_cache_size', 'result_cache_ttl', 'result_cache_warm_users')
+
+class TopNTable:
+    """Ranked post codes and scores for every user code of one algorithm"""
+    
+    def __init__(self, offsets, post_codes, scores):
+        self.offsets = offsets
+        self.post_codes = post_codes
+        self.scores = scores
+    
+    @property
+    def n_users(self):
+        return len(self.offsets) - 1
+    
+    def state(self):
+        return {'offsets': self.offsets, 'post_codes': self.post_codes, 'scores': self.scores}
+    
+    @classmethod
+    def from_state(cls, state):
+        return cls(state['offsets'], state['post_codes'], state['scores'])
+    
+    def lookup(self, user_code, n):
+        """(post codes, scores) of the first ``n`` entries of one user"""
+        start = self.offsets[user_code]
+        stop = min(self.offsets[user_code + 1], start + n)
+        return self.post_codes[start:stop], self.scores[start:stop]
+    
+    def gather(self, user_codes, n):
+        """Columnar (user index, rank, post codes, scores) of the first ``n`` entries of many users"""
+        starts = self.offsets[user_codes]
+        lengths = np.minimum(self.offsets[user_codes + 1] - starts, n)
+        user_index = np.repeat(np.arange(len(user_codes)), lengths)
+        ranks = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + 1
+        flat = np.repeat(starts, lengths) + ranks - 1
+        return user_index, ranks, self.post_codes[flat], self.scores[flat]
+
+def build_table(engine, algorithm, n, chunk_size=1024, n_jobs=None):
+    """Score every user code of ``engine`` live and pack the top ``n`` into a ``TopNTable``"""
+    if algorithm not in engine.BATCH_ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    score_chunk = getattr(engine, engine.BATCH_ALGORITHMS[algorithm])
+    user_ids = np.asarray(engine.user_vocab.ids, dtype=object)
+    starts = range(0, len(user_ids), chunk_size)
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        results = list(executor.map(lambda start: score_chunk(user_ids[start:start + chunk_size], n), starts))
+    
+    # Chunks follow code order; within a chunk entries are ordered by user, then rank
+    counts = np.zeros(len(user_ids), dtype=np.int64)
+    post_codes, scores = [], []
+    for start, (user_index, ranks, post_rows, chunk_scores) in zip(starts, results):
+        order = np.lexsort((ranks, user_index))
+        counts[start:start + chunk_size] = np.bincount(user_index, minlength=min(chunk_size, len(user_ids) - start))
+        post_codes.append(engine.post_row_codes[post_rows[order]].astype(np.int32))
+        scores.append(np.asarray(chunk_scores, dtype=np.float32)[order])
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return TopNTable(
+        offsets,
+        np.concatenate(post_codes) if post_codes else np.empty(0, dtype=np.int32),
+        np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+    )
+
+def _fingerprint(ids):
+    """Order-sensitive hash of an id sequence"""
+    values = pd.Series(np.asarray(ids).astype(str))
+    return int(pd.util.hash_pandas_object(values, index=True).sum())
+
+# Fitted arrays that determine every algorithm's scores; a table built from other data differs in one of them
+_FINGERPRINTED = (
+    'user_tag_matrix', 'post_tag_matrix', 'content_features', 'user_interest_features',
+    'seen_matrix', 'liked_matrix', 'post_popularity'
+)
+
+def data_fingerprint(engine):
+    """Hash of the engagement and content structures of a fitted engine"""
+    digest = hashlib.sha256()
+    values = [getattr(engine, name) for name in _FINGERPRINTED]
+    values += [engine.user_item_matrix.csr, engine.engagement_index.csr]
+    for value in values:
+        arrays = (value.data, value.indices, value.indptr) if sp.issparse(value) else (value,)
+        for array in arrays:
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+def _model_config(config):
+    return json.dumps({name: value for name, value in config.items() if name not in _SERVING_ONLY},
+                      sort_keys=True, default=str)
+
+def materialize(engine, out_dir, algorithms=MATERIALIZED_ALGORITHMS, n=50, chunk_size=1024, n_jobs=None):
+    """Build a table per algorithm for every user of a fitted engine and save them under ``out_dir``
+
+    Returns the version directory. The manifest records the engine config
+    and fingerprints of its id vocabularies and fitted data, which
+    ``load_tables`` checks before an engine serves from the tables.
+    """
+    state = {}
+    for algorithm in algorithms:
+        with engine.metrics.stage(f'materialize.{algorithm}'):
+            state[algorithm] = build_table(engine, algorithm, n, chunk_size, n_jobs).state()
+    config = {
+        'n': n,
+        'algorithms': list(algorithms),
+        'engine_config': engine.config(),
+        'engine_artifact_version': engine.artifact_version,
+        'users': len(engine.user_vocab),
+        'posts': len(engine.post_vocab),
+        'user_fingerprint': _fingerprint(engine.user_vocab.ids),
+        'post_fingerprint': _fingerprint(engine.post_vocab.ids),
+        'data_fingerprint': data_fingerprint(engine)
+    }
+    return save_state(state, out_dir, config)
+
+def load_tables(engine, path, mmap_mode='r'):
+    """Read tables saved by ``materialize``; returns ``({algorithm: TopNTable}, manifest config)``
+
+    Raises ValueError unless ``engine`` has the config, id codes and fitted
+    data the tables were built with, so tables from an older engagement
+    log are rejected after a refit.
+    """
+    state, manifest = load_state(path, mmap_mode)
+    config = manifest['config']
+    if _model_config(config['engine_config']) != _model_config(engine.config()):
+        raise ValueError("Top-N tables were built with a different engine config")
+    if (len(engine.user_vocab) < config['users'] or len(engine.post_vocab) < config['posts']
+            or _fingerprint(engine.user_vocab.ids[:config['users']]) != config['user_fingerprint']
+            or _fingerprint(engine.post_vocab.ids[:config['posts']]) != config['post_fingerprint']):
+        raise ValueError("Top-N tables were built from different users or posts")
+    if config.get('data_fingerprint') != data_fingerprint(engine):
+        raise ValueError("Top-N tables were built from different engagement or content data; materialize them again")
+    return {algorithm: TopNTable.from_state(state[algorithm]) for algorithm in config['algorithms']}, config
+
+def precomputed(algorithm):
+    """Method decorator serving ``(user_id, n_recommendations)`` calls from ``self.topn_tables`` when fresh"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, user_id, n_recommendations=3):
+            if self.topn_tables:
+                records = self._table_records(algorithm, user_id, n_recommendations)
+                if records is not None:
+                    return records
+            return method(self, user_id, n_recommendations)
+        return wrapper
+    return decorator
@@ -0,0 +1,33 @@
+import itertools
+
+import pytest
+
+from ambrix import ContentRecommendationSystem
+from ambrix.synthetic import generate_dataset, write_dataset
+
+@pytest.fixture(scope='session')
+def frames():
+    """Small synthetic (users_df, posts_df, engagements_df) shared by every test"""
+    return generate_dataset(n_users=300, n_posts=120, density=0.05, seed=1)
+
+@pytest.fixture(scope='session')
+def data_files(frames, tmp_path_factory):
+    return write_dataset(frames, tmp_path_factory.mktemp('data'))
+
+@pytest.fixture
+def fit(tmp_path):
+    """Fit an engine on engagement frames, read back through load_data like real input files"""
+    counter = itertools.count()
+    
+    def fit(users_df, posts_df, engagements_df, **params):
+        files = write_dataset((users_df, posts_df, engagements_df), tmp_path / f'fit{next(counter)}')
+        engine = ContentRecommendationSystem(**params)
+        assert engine.load_data(*files), engine.load_error
+        return engine
+    return fit
+
+@pytest.fixture
+def engine(data_files):
+    engine = ContentRecommendationSystem()
+    assert engine.load_data(*data_files), engine.load_error
+    return engine
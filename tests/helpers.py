@@ -0,0 +1,14 @@
+"""Assertions shared by the test modules"""
+import pandas as pd
+
+ALGORITHMS = ('content', 'tfidf', 'collaborative', 'item', 'als', 'hybrid')
+
+def post_ids(records):
+    return [record['post_id'] for record in records]
+
+def as_strings(frame):
+    """recommend_batch output with plain string ids, for comparisons across engines"""
+    return frame.assign(user_id=frame['user_id'].astype(str), post_id=frame['post_id'].astype(str))
+
+def assert_same_batches(left, right):
+    pd.testing.assert_frame_equal(as_strings(left), as_strings(right), check_dtype=False, rtol=1e-5)
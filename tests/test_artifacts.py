@@ -0,0 +1,27 @@
+import pytest
+
+from ambrix import ContentRecommendationSystem
+from helpers import ALGORITHMS, assert_same_batches
+
+@pytest.mark.parametrize('mmap_mode', ['r', None])
+def test_save_load_round_trip(engine, tmp_path, mmap_mode):
+    user_ids = [*engine.users_df['user_id'][:40].astype(str), 'UNKNOWN']
+    expected = {algorithm: engine.recommend_batch(user_ids, algorithm, 5) for algorithm in ALGORITHMS}
+    engine.save(tmp_path / 'artifacts')
+    
+    loaded = ContentRecommendationSystem.load(tmp_path / 'artifacts', mmap_mode=mmap_mode)
+    assert loaded.config() == engine.config()
+    for algorithm in ALGORITHMS:
+        assert_same_batches(loaded.recommend_batch(user_ids, algorithm, 5), expected[algorithm])
+    assert loaded.recommend(user_ids[0], 'hybrid', 5) == engine.recommend(user_ids[0], 'hybrid', 5)
+
+def test_unbuilt_lazy_models_are_left_out(engine, tmp_path):
+    engine.save(tmp_path / 'artifacts', build=False)
+    assert engine.item_similarity is None and engine.als_model is None
+    
+    loaded = ContentRecommendationSystem.load(tmp_path / 'artifacts')
+    assert loaded.item_similarity is None and loaded.als_model is None
+    user_ids = list(engine.users_df['user_id'][:40].astype(str))
+    for algorithm in ALGORITHMS:
+        expected = engine.recommend_batch(user_ids, algorithm, 5)
+        assert_same_batches(loaded.recommend_batch(user_ids, algorithm, 5), expected)
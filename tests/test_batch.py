@@ -0,0 +1,33 @@
+import pytest
+
+from ambrix.toptables import materialize
+from helpers import ALGORITHMS, post_ids
+
+USER_IDS = ['U2', 'NOPE', 'U1', 'U250', 'ALSO_NOPE', 'U2']
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_rows_follow_input_order(engine, algorithm):
+    frame = engine.recommend_batch(USER_IDS, algorithm, 3, chunk_size=4)
+    users = list(frame['user_id'].astype(str))
+    runs = [user_id for i, user_id in enumerate(users) if i == 0 or users[i - 1] != user_id]
+    # Users without candidates (e.g. no collaborative neighbours) have no rows
+    assert runs == [user_id for user_id in USER_IDS if user_id in runs]
+    assert 'NOPE' in runs
+    assert (frame.groupby((frame['user_id'] != frame['user_id'].shift()).cumsum())['rank'].first() == 1).all()
+
+def test_table_and_live_rows_agree(engine, tmp_path):
+    live = engine.recommend_batch(USER_IDS, 'hybrid', 3)
+    materialize(engine, tmp_path / 'tables', ('hybrid',), n=10)
+    engine.load_topn_tables(tmp_path / 'tables')
+    # Mix table-served and live users within one chunk
+    engine.ingest_engagements([{'user_id': 'U250', 'post_id': 'P1', 'engagement': 0}])
+    served = engine.recommend_batch(USER_IDS, 'hybrid', 3)
+    assert list(served['user_id'].astype(str)) == list(live['user_id'].astype(str))
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_single_user_calls_match_the_batch(engine, algorithm):
+    user_ids = [*engine.users_df['user_id'].astype(str), 'NOPE']
+    frame = engine.recommend_batch(user_ids, algorithm, 5)
+    batch = {user_id: list(rows['post_id']) for user_id, rows in frame.groupby('user_id', sort=False, observed=True)}
+    for user_id in user_ids:
+        assert post_ids(engine.recommend(user_id, algorithm, 5)) == batch.get(user_id, []), user_id
@@ -0,0 +1,49 @@
+from ambrix.cache import ResultCache
+
+def test_ingest_invalidates_only_the_batch_users(engine):
+    engine.recommend('U1', 'hybrid', 5)
+    engine.recommend('U2', 'hybrid', 5)
+    assert engine.result_cache.stats()['users'] == 2
+    
+    seen = engine.recommend('U1', 'hybrid', 5)[0]['post_id']
+    engine.ingest_engagements([{'user_id': 'U1', 'post_id': seen, 'engagement': 1}])
+    assert engine.result_cache.stats()['users'] == 1
+    
+    hits = engine.result_cache.hits
+    assert seen not in [record['post_id'] for record in engine.recommend('U1', 'hybrid', 5)]
+    engine.recommend('U2', 'hybrid', 5)
+    assert engine.result_cache.hits == hits + 1
+
+def test_returned_records_are_copies(engine):
+    engine.recommend('U1', 'hybrid', 3)[0]['score'] = -1
+    assert engine.recommend('U1', 'hybrid', 3)[0]['score'] != -1
+
+def test_put_after_invalidation_is_discarded():
+    cache = ResultCache()
+    generation = cache.generation('U1')
+    cache.invalidate_users(['U1'])
+    cache.put(('U1', 'hybrid', 3, 0), [], generation)
+    assert len(cache) == 0
+
+def test_clear_resets_generations_and_rejects_in_flight_puts():
+    cache = ResultCache()
+    cache.invalidate_users(['U1'])
+    generation = cache.generation('U2')
+    cache.clear()
+    assert not cache._generations
+    cache.put(('U2', 'hybrid', 3, 0), [], generation)
+    assert len(cache) == 0
+
+def test_generations_are_bounded():
+    cache = ResultCache(max_entries=10)
+    for i in range(100):
+        cache.invalidate_users([f'U{i}'])
+    assert len(cache._generations) <= 10
+
+def test_entries_expire_after_ttl():
+    now = [0.0]
+    cache = ResultCache(ttl_seconds=5, clock=lambda: now[0])
+    cache.put(('U1', 'hybrid', 3, 0), [])
+    now[0] = 10.0
+    assert cache.get(('U1', 'hybrid', 3, 0)) is None
+    assert cache.expirations == 1
@@ -0,0 +1,31 @@
+import pytest
+
+def baseline_content_scores(users_df, posts_df, engagements_df, user_id):
+    """The original iterrows content scorer, kept as the reference the sparse scorer must match"""
+    user_data = users_df[users_df['user_id'] == user_id].iloc[0]
+    user_interests = str(user_data['top_3_interests']).split(', ')
+    post_scores = []
+    for _, post in posts_df.iterrows():
+        score = 0
+        post_tags = str(post['tags']).split(', ')
+        if user_interests and post_tags:
+            score += len(set(user_interests) & set(post_tags)) * 2
+        past_engagement = engagements_df[
+            (engagements_df['user_id'] == user_id) & (engagements_df['post_id'] == post['post_id'])
+        ]
+        if len(past_engagement) == 0:
+            score += 1
+        elif past_engagement.iloc[0]['engagement'] == 0:
+            score -= 1
+        post_scores.append((post['post_id'], score))
+    post_scores.sort(key=lambda item: item[1], reverse=True)
+    return post_scores
+
+@pytest.mark.parametrize('n', [3, 20])
+def test_content_scores_match_the_baseline_scorer(engine, frames, n):
+    users_df, posts_df, engagements_df = frames
+    for user_id in users_df['user_id'][::15]:
+        expected = baseline_content_scores(users_df, posts_df, engagements_df, user_id)[:n]
+        actual = engine.recommend(user_id, 'content', n)
+        assert [(record['post_id'], record['score']) for record in actual] == expected, user_id
+        assert all(type(record['score']) is int for record in actual)
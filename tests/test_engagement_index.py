@@ -0,0 +1,22 @@
+import pandas as pd
+
+def test_flags_follow_the_first_engagement(engine, frames):
+    users_df, posts_df, engagements_df = frames
+    first = engagements_df.drop_duplicates(['user_id', 'post_id']).set_index(['user_id', 'post_id'])['engagement']
+    for user_id in users_df['user_id'][:40]:
+        for post_id in posts_df['post_id']:
+            engagement = first.get((user_id, post_id))
+            assert engine.has_seen(user_id, post_id) == (engagement is not None)
+            assert engine.has_disliked(user_id, post_id) == (engagement == 0)
+
+def test_later_engagements_keep_the_first_flag(engine, frames):
+    engagements_df = frames[2]
+    user_id, post_id, engagement = engagements_df.iloc[0]
+    engine.ingest_engagements(pd.DataFrame({'user_id': [user_id], 'post_id': [post_id], 'engagement': [1 - engagement]}))
+    assert engine.has_seen(user_id, post_id)
+    assert engine.has_disliked(user_id, post_id) == (engagement == 0)
+
+def test_unknown_ids_are_unseen(engine):
+    assert not engine.has_seen('NOPE', 'P1')
+    assert not engine.has_seen('U1', 'NOPE')
+    assert not engine.has_disliked('NOPE', 'NOPE')
@@ -0,0 +1,14 @@
+import pandas as pd
+import pytest
+
+from helpers import post_ids
+
+@pytest.mark.parametrize('normalization', ['minmax', 'zscore', 'rank', 'none'])
+def test_hybrid_never_returns_a_disliked_post(fit, frames, normalization):
+    users_df, posts_df, engagements_df = frames
+    # No profile and a single dislike: every fused component is constant for this user
+    dislike = pd.DataFrame({'user_id': ['GHOST'], 'post_id': ['P1'], 'engagement': [0]})
+    engine = fit(users_df, posts_df, pd.concat([engagements_df, dislike], ignore_index=True),
+                 hybrid_normalization=normalization)
+    assert 'P1' not in post_ids(engine.recommend('GHOST', 'hybrid', 10))
+    assert 'P1' not in list(engine.recommend_batch(['GHOST'], 'hybrid', 10)['post_id'].astype(str))
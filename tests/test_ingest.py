@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ambrix.loaders import SchemaError
+from helpers import ALGORITHMS, post_ids
+
+@pytest.fixture
+def split(frames):
+    users_df, posts_df, engagements_df = frames
+    cut = len(engagements_df) - 200
+    extra = pd.DataFrame({'user_id': ['UNEW', 'UNEW'], 'post_id': ['P1', 'P2'], 'engagement': [1, 0]})
+    return users_df, posts_df, engagements_df.iloc[:cut], engagements_df.iloc[cut:], extra
+
+# ALS re-solves only touched users against fixed post factors, so it is not refit-exact
+@pytest.mark.parametrize('algorithm', [algorithm for algorithm in ALGORITHMS if algorithm != 'als'])
+def test_ingest_matches_full_refit(fit, split, algorithm):
+    users_df, posts_df, base, rest, extra = split
+    incremental = fit(users_df, posts_df, base)
+    for chunk in np.array_split(np.arange(len(rest)), 4):
+        incremental.ingest_engagements(rest.iloc[chunk])
+    incremental.ingest_engagements(extra.to_dict('records'))
+    refit = fit(users_df, posts_df, pd.concat([base, rest, extra], ignore_index=True))
+    
+    assert (refit.engagement_index.csr != incremental.engagement_index.csr).nnz == 0
+    for user_id in [*users_df['user_id'][:60], 'UNEW']:
+        expected = refit.recommend(user_id, algorithm, 5)
+        actual = incremental.recommend(user_id, algorithm, 5)
+        assert post_ids(actual) == post_ids(expected), user_id
+        np.testing.assert_allclose([r['score'] for r in actual], [r['score'] for r in expected], rtol=1e-6)
+
+def test_large_batch_of_distinct_pairs(fit, frames):
+    users_df, posts_df, engagements_df = frames
+    engine = fit(*frames)
+    # 3000 pairs over 300 users and 100 posts, none engaged with before
+    seen = set(zip(engagements_df['user_id'], engagements_df['post_id']))
+    pairs = [(user_id, post_id) for user_id in users_df['user_id'] for post_id in posts_df['post_id'][:100]
+             if (user_id, post_id) not in seen][:3000]
+    batch = pd.DataFrame(pairs, columns=['user_id', 'post_id']).assign(engagement=np.arange(len(pairs)) % 2)
+    
+    before = engine.user_item_matrix.counts.nnz
+    engine.ingest_engagements(batch)
+    assert engine.user_item_matrix.counts.nnz == before + len(pairs)
+    refit = fit(users_df, posts_df, pd.concat([engagements_df, batch], ignore_index=True))
+    assert (refit.engagement_index.csr != engine.engagement_index.csr).nnz == 0
+    for user_id in users_df['user_id'][:40]:
+        expected = refit.recommend(user_id, 'collaborative', 5)
+        assert post_ids(engine.recommend(user_id, 'collaborative', 5)) == post_ids(expected)
+
+def test_ingest_keeps_timestamps_of_row_dicts(engine):
+    engine.ingest_engagements([{'user_id': 'U1', 'post_id': 'P3', 'engagement': 1, 'timestamp': 1_700_000_000}])
+    assert engine.engagements_df['timestamp'].iloc[-1] == 1_700_000_000
+
+@pytest.mark.parametrize('batch', [
+    [{'user_id': 'U1', 'post_id': 'P1', 'engagement': 'yes'}],
+    [{'user_id': 'U1', 'post_id': 'P1'}],
+    [{'user_id': None, 'post_id': 'P1', 'engagement': 1}]
+])
+def test_ingest_rejects_invalid_batches(engine, batch):
+    with pytest.raises(SchemaError):
+        engine.ingest_engagements(batch)
@@ -0,0 +1,3 @@
+def test_memory_usage_does_not_build_lazy_models(engine):
+    engine.memory_usage()
+    assert engine.item_similarity is None and engine.als_model is None
@@ -0,0 +1,13 @@
+from ambrix.registry import ModelRegistry
+
+def test_models_built_after_load_count_towards_the_budget(fit, frames):
+    first, second = fit(*frames), fit(*frames)
+    registry = ModelRegistry(memory_budget_bytes=first.memory_usage() + second.memory_usage())
+    lease = registry.acquire('first', lambda: first)
+    lease.engine.get_als_model()
+    lease.release()
+    assert registry.stats()['evictions'] == 0
+    
+    registry.acquire('second', lambda: second)
+    assert registry.stats()['models'] == 1
+    assert registry.stats()['evictions'] == 1
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from ambrix.service import RecommendationService
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = json.dumps(body).encode() if body is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+def _call(engine, *requests):
+    """Start a service on a free port, send ``requests`` in order and return their (status, payload)"""
+    async def run():
+        service = RecommendationService(engine, max_wait_ms=1)
+        server = await service.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            # A request whose future is never resolved would otherwise hang the test
+            return [await asyncio.wait_for(_request(port, *request), 30) for request in requests]
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.executor.shutdown()
+    return asyncio.run(run())
+
+@pytest.mark.parametrize('request_', [
+    ('POST', '/recommend/batch', {'user_ids': [['U1']]}),
+    ('POST', '/recommend/batch', {'user_ids': ['U1', {'id': 'U2'}]}),
+    ('POST', '/recommend/batch', {'user_ids': ['U1', 2]}),
+    ('POST', '/recommend/batch', {'user_ids': 'U1'}),
+    ('POST', '/recommend/batch', {'user_ids': []}),
+    ('POST', '/recommend', {'user_id': ['U1']}),
+    ('POST', '/recommend', {'user_id': {'id': 'U1'}}),
+    ('GET', '/recommend'),
+    ('GET', '/recommend?user_id=U1&n=0'),
+    ('GET', '/recommend?user_id=U1&algorithm=nope'),
+    ('POST', '/recommend', {'user_id': 'U1', 'algorithm': ['hybrid']}),
+    ('POST', '/recommend/batch', {'user_ids': ['U1'], 'algorithm': {'name': 'hybrid'}}),
+    ('GET', '/similar-posts', {'post_id': ['P1']})
+])
+def test_malformed_requests_get_400(engine, request_):
+    [(status, payload)] = _call(engine, request_)
+    assert status == 400
+    assert 'error' in payload
+
+def test_recommendations_match_the_engine(engine):
+    expected = engine.recommend('U1', 'hybrid', 3)
+    (status, single), (_, batch) = _call(
+        engine,
+        ('GET', '/recommend?user_id=U1&algorithm=hybrid&n=3'),
+        ('POST', '/recommend/batch', {'user_ids': ['U2', 'U1', 'U2'], 'n': 3})
+    )
+    assert status == 200
+    assert single['recommendations'] == expected
+    assert [result['user_id'] for result in batch['results']] == ['U2', 'U1', 'U2']
+    assert batch['results'][1]['recommendations'] == expected
+
+def test_micro_batches_use_the_result_cache(engine):
+    _call(engine, ('GET', '/recommend?user_id=U1&n=3'))
+    hits = engine.result_cache.hits
+    [(status, _)] = _call(engine, ('GET', '/recommend?user_id=U1&n=3'))
+    assert status == 200
+    assert engine.result_cache.hits == hits + 1
@@ -0,0 +1,13 @@
+import pytest
+
+from helpers import ALGORITHMS
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_posts_without_tags(fit, frames, algorithm):
+    users_df, posts_df, engagements_df = frames
+    engine = fit(users_df, posts_df.drop(columns='tags'), engagements_df,
+                 hybrid_weights={'content': 0.4, 'collaborative': 0.3, 'tfidf': 0.3})
+    # Collaborative may find fewer candidates than requested
+    assert 0 < len(engine.recommend('U1', algorithm, 3)) <= 3
+    frame = engine.recommend_batch(['U1', 'NOPE'], algorithm, 3)
+    assert set(frame['user_id'].astype(str)) <= {'U1', 'NOPE'}
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from ambrix.toptables import materialize
+from helpers import ALGORITHMS, assert_same_batches
+
+def test_tables_from_older_engagements_are_rejected(fit, frames, tmp_path):
+    users_df, posts_df, engagements_df = frames
+    older = fit(users_df, posts_df, engagements_df.iloc[:-100])
+    materialize(older, tmp_path / 'tables', ('collaborative',), n=10)
+    
+    # Same users, posts and config, but a longer engagement log
+    current = fit(users_df, posts_df, engagements_df)
+    with pytest.raises(ValueError, match="different engagement"):
+        current.load_topn_tables(tmp_path / 'tables')
+    assert not current.topn_tables
+
+def test_tables_from_another_config_are_rejected(fit, frames, tmp_path):
+    engine = fit(*frames)
+    materialize(engine, tmp_path / 'tables', ('hybrid',), n=10)
+    other = fit(*frames, collaborative_neighbors=10)
+    with pytest.raises(ValueError, match="engine config"):
+        other.load_topn_tables(tmp_path / 'tables')
+
+def test_tables_serve_the_live_results(fit, frames, tmp_path):
+    engine = fit(*frames)
+    user_ids = [*engine.users_df['user_id'][:50].astype(str), 'UNKNOWN']
+    live = {algorithm: engine.recommend_batch(user_ids, algorithm, 5) for algorithm in ('content', 'hybrid')}
+    materialize(engine, tmp_path / 'tables', ('content', 'hybrid'), n=10)
+    
+    serving = fit(*frames)
+    serving.load_topn_tables(tmp_path / 'tables')
+    for algorithm, expected in live.items():
+        assert_same_batches(serving.recommend_batch(user_ids, algorithm, 5), expected)
+    assert serving.metrics.as_dict()['counters']['topn_served'] > 0
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_table_scores_keep_the_live_types(fit, frames, tmp_path, algorithm):
+    users_df, posts_df, engagements_df = frames
+    # Users with engagements but no profile get float popularity scores even from content
+    ghosts = pd.DataFrame({'user_id': ['GHOST1', 'GHOST2'], 'post_id': ['P1', 'P2'], 'engagement': [1, 0]})
+    frames = users_df, posts_df, pd.concat([engagements_df, ghosts], ignore_index=True)
+    engine = fit(*frames)
+    profiled = list(users_df['user_id'][:20].astype(str))
+    batches = [profiled, [*profiled, 'GHOST1', 'GHOST2']]
+    live_batches = [engine.recommend_batch(user_ids, algorithm, 5) for user_ids in batches]
+    live = {user_id: engine.recommend(user_id, algorithm, 5) for user_id in batches[1]}
+    materialize(engine, tmp_path / 'tables', (algorithm,), n=10)
+    
+    serving = fit(*frames)
+    serving.load_topn_tables(tmp_path / 'tables')
+    for user_ids, expected in zip(batches, live_batches):
+        served = serving.recommend_batch(user_ids, algorithm, 5)
+        assert served['score'].dtype == expected['score'].dtype
+        assert_same_batches(served, expected)
+    for user_id, expected in live.items():
+        actual = serving.recommend(user_id, algorithm, 5)
+        assert [(r['post_id'], type(r['score'])) for r in actual] == [(r['post_id'], type(r['score'])) for r in expected]
+        assert [r['score'] for r in actual] == pytest.approx([r['score'] for r in expected], rel=1e-5)
+    assert serving.metrics.as_dict()['counters']['topn_served'] > 0
+
+def test_ingested_users_are_scored_live(fit, frames, tmp_path):
+    engine = fit(*frames)
+    materialize(engine, tmp_path / 'tables', ('hybrid',), n=10)
+    engine.load_topn_tables(tmp_path / 'tables')
+    top = engine.recommend('U1', 'hybrid', 3)[0]['post_id']
+    engine.ingest_engagements([{'user_id': 'U1', 'post_id': top, 'engagement': 1}])
+    assert top not in [record['post_id'] for record in engine.recommend('U1', 'hybrid', 3)]